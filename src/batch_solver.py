@@ -0,0 +1,171 @@
+'''
+Batch entry point for solving many mazes at once across a pool of worker processes.
+Mazes are shipped to the workers as their raw rows, in chunks, and parsed into
+MazeProblems there, so that only strings and results cross process boundaries.
+'''
+from maze_problem import MazeProblem
+from pathfinder import SearchBudget, SearchStatus, solve
+from dataclasses import dataclass
+from typing import *
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+import itertools
+import os
+import time
+
+@dataclass(slots=True)
+class BatchResult:
+    """
+    Outcome of solving one maze of a batch, with the stats needed to spot slow outliers.
+
+    Attributes:
+        index (int):
+            The position of the maze in the input sequence.
+        solution (Optional[list[str]]):
+            The solution found by pathfind, or None.
+        cost (int):
+            The total cost of solution, or -1 if there is none.
+        expansions (int):
+            The number of nodes expanded while solving the maze.
+        wall_time (float):
+            Seconds spent parsing and solving the maze in its worker.
+        status (SearchStatus):
+            Whether the maze was solved, proven unsolvable, or its search hit the per-maze
+            timeout.
+    """
+    index: int
+    solution: Optional[list[str]]
+    cost: int
+    expansions: int
+    wall_time: float
+    status: SearchStatus
+
+def _solve_chunk(chunk: list[tuple[int, list[str]]], timeout: Optional[float]) -> list[BatchResult]:
+    """
+    Parses and solves each maze of a chunk in turn; runs inside the worker processes.
+
+    Parameters:
+        chunk (list[tuple[int, list[str]]]):
+            The (input index, maze rows) pairs to solve.
+        timeout (Optional[float]):
+            The time limit in seconds for each maze, or None for no limit.
+
+    Returns:
+        list[BatchResult]:
+            One result per maze of the chunk, in the same order.
+    """
+    results = []
+    budget = SearchBudget(time_limit=timeout)
+    for (index, maze) in chunk:
+        start = time.perf_counter()
+        result = solve(MazeProblem(maze), budget=budget)
+        results.append(BatchResult(index, result.solution, result.cost, result.expansions, time.perf_counter() - start, result.status))
+    return results
+
+def pathfind_many(mazes: Iterable[list[str]], workers: Optional[int] = None, timeout: Optional[float] = None, chunk_size: int = 16, ordered: bool = True) -> Iterator[BatchResult]:
+    """
+    Solves every maze of the given sequence with pathfind, in parallel across worker
+    processes, streaming back the results as they become available.
+
+    Parameters:
+        mazes (Iterable[list[str]]):
+            The mazes to solve, each as the list of string rows MazeProblem is constructed on.
+            The iterable is consumed lazily, so it may be a generator over a large corpus.
+        workers (Optional[int]):
+            The number of worker processes, defaulting to the number of CPUs; 0 solves the
+            mazes in the calling process instead.
+        timeout (Optional[float]):
+            The time limit in seconds for each maze, or None for no limit.
+        chunk_size (int):
+            The number of mazes sent to a worker at a time; larger chunks amortize the
+            inter-process overhead of small mazes.
+        ordered (bool):
+            Whether to yield results in input order (True) or as soon as they complete (False).
+
+    Returns:
+        Iterator[BatchResult]:
+            One result per input maze.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    indexed = enumerate(mazes)
+    chunks = iter(lambda: list(itertools.islice(indexed, chunk_size)), [])
+    if workers == 0:
+        for chunk in chunks:
+            yield from _solve_chunk(chunk, timeout)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        yield from _stream_results(executor, chunks, timeout, 2 * workers, ordered)
+
+def _stream_results(executor: Executor, chunks: Iterator[list[tuple[int, list[str]]]], timeout: Optional[float], max_in_flight: int, ordered: bool) -> Iterator[BatchResult]:
+    """
+    Keeps up to max_in_flight chunks submitted to the executor, yielding their results in
+    input order or in completion order.
+
+    Parameters:
+        executor (Executor):
+            The pool solving the chunks.
+        chunks (Iterator[list[tuple[int, list[str]]]]):
+            The chunks left to submit.
+        timeout (Optional[float]):
+            The time limit in seconds for each maze, or None for no limit.
+        max_in_flight (int):
+            The most chunks submitted but not yet yielded at any time.
+        ordered (bool):
+            Whether to yield results in input order (True) or as soon as they complete (False).
+
+    Returns:
+        Iterator[BatchResult]:
+            The results of every chunk.
+    """
+    in_flight: dict[Future, int] = {}
+    finished: dict[int, list[BatchResult]] = {}
+    next_chunk, next_to_yield = 0, 0
+    exhausted = False
+    while True:
+        while not exhausted and len(in_flight) + len(finished) < max_in_flight:
+            chunk = next(chunks, None)
+            if chunk is None:
+                exhausted = True
+                break
+            in_flight[executor.submit(_solve_chunk, chunk, timeout)] = next_chunk
+            next_chunk += 1
+        if not in_flight:
+            return
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            chunk_num = in_flight.pop(future)
+            if not ordered:
+                yield from future.result()
+                continue
+            finished[chunk_num] = future.result()
+        while next_to_yield in finished:
+            yield from finished.pop(next_to_yield)
+            next_to_yield += 1
+
+def verify_solutions(pairs: Iterable[tuple[Union[MazeProblem, list[str]], Optional[Sequence[str]]]]) -> list[dict]:
+    """
+    Checks many plans at once with MazeProblem.verify_solution, e.g., the results of a
+    batch before they are served. Mazes given as rows are parsed once per batch, however
+    many plans they come with.
+
+    Parameters:
+        pairs (Iterable[tuple[Union[MazeProblem, list[str]], Optional[Sequence[str]]]]):
+            The (maze, plan) pairs to check, each maze either a MazeProblem or its rows.
+
+    Returns:
+        list[dict]:
+            The verify_solution result of every pair, in order.
+    """
+    parsed: dict[tuple[str, ...], MazeProblem] = {}
+    results = []
+    for (maze, solution) in pairs:
+        if not isinstance(maze, MazeProblem):
+            key = tuple(maze)
+            problem = parsed.get(key)
+            if problem is None:
+                problem = parsed[key] = MazeProblem(maze)
+            maze = problem
+        results.append(maze.verify_solution(solution))
+    return results
@@ -0,0 +1,357 @@
+'''
+Benchmarks of the package's hot paths, for catching performance regressions, run as a
+script, e.g.:
+
+    python benchmarks.py construction --cells 1000000
+    python benchmarks.py pathfind primitives verify --corpus small medium --json results.json
+    python benchmarks.py parallel --corpus large --workers 1 2 4 8 16
+    python benchmarks.py startup --corpus small large
+
+Mazes come from the fixed corpora of maze_generator, so runs of different versions on the
+same machine see the same inputs. Each measurement prints its latency percentiles (and
+throughput or peak memory where relevant); --json also writes them, along with a
+description of the machine, to a file that can be compared between versions.
+'''
+from maze_problem import MazeProblem
+from maze_generator import CORPORA, generate_maze, load_corpus
+from pathfinder import SearchStats, solve
+from batch_solver import verify_solutions
+from parallel_astar import solve_parallel
+from typing import *
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+Measurements = dict[str, dict[str, float]]
+
+def summarize(times: list[float], **extra: float) -> dict[str, float]:
+    """
+    Summarizes the latencies of repeated calls.
+
+    Parameters:
+        times (list[float]):
+            The wall time of each call, in seconds.
+        extra (float):
+            Further figures to include in the summary, e.g., throughput.
+
+    Returns:
+        dict[str, float]:
+            The number of calls, their total time in seconds, and their best, median (p50) and
+            99th percentile (p99) latencies in microseconds, along with extra.
+    """
+    ordered = sorted(times)
+    p99 = ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] if ordered else 0.0
+    summary = {
+        "count": len(times),
+        "total_s": sum(times),
+        "best_us": ordered[0] * 1e6 if ordered else 0.0,
+        "p50_us": statistics.median(ordered) * 1e6 if ordered else 0.0,
+        "p99_us": p99 * 1e6,
+    }
+    summary.update(extra)
+    return summary
+
+def time_calls(func: Callable[..., Any], args: Iterable[tuple]) -> list[float]:
+    """
+    Times one call of the given function per tuple of arguments.
+
+    Parameters:
+        func (Callable[..., Any]):
+            The function to time.
+        args (Iterable[tuple]):
+            The arguments of each call.
+
+    Returns:
+        list[float]:
+            The wall time of each call, in seconds.
+    """
+    times = []
+    for call_args in args:
+        start = time.perf_counter()
+        func(*call_args)
+        times.append(time.perf_counter() - start)
+    return times
+
+def report(name: str, summary: dict[str, float]) -> None:
+    """
+    Prints a summary made by summarize, on a single line.
+
+    Parameters:
+        name (str):
+            What was measured.
+        summary (dict[str, float]):
+            The figures measured.
+    """
+    extras = "   ".join(f"{key} {value:,.1f}" for (key, value) in summary.items() if key not in ("count", "total_s", "best_us", "p50_us", "p99_us"))
+    print(f"{name:<44} n {summary['count']:>7}   p50 {summary['p50_us']:12,.1f} us   p99 {summary['p99_us']:12,.1f} us   {extras}")
+
+def benchmark_construction(cells: int = 1_000_000, repeats: int = 5, seed: int = 0, **_: Any) -> Measurements:
+    """
+    Measures the construction of a square random maze of about the given number of cells,
+    from string rows and from a file, along with the queries handing out its targets.
+
+    Parameters:
+        cells (int):
+            The approximate number of cells of the maze.
+        repeats (int):
+            The number of times each construction is repeated.
+        seed (int):
+            The seed of the maze.
+
+    Returns:
+        Measurements:
+            The summary of each measurement, by name.
+    """
+    side = max(3, round(cells ** 0.5))
+    rows = generate_maze(side, side, seed, targets=max(1, side // 10))
+    problem = MazeProblem(rows)
+    results: Measurements = {}
+    results["MazeProblem(rows)"] = summarize(time_calls(MazeProblem, [(rows,)] * repeats), ns_per_cell=0.0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "maze.txt")
+        with open(path, "w") as maze_file:
+            maze_file.write("\n".join(rows))
+        results["MazeProblem.from_file"] = summarize(time_calls(MazeProblem.from_file, [(path,)] * repeats), ns_per_cell=0.0)
+    for summary in results.values():
+        summary["ns_per_cell"] = summary["best_us"] * 1e3 / (side * side)
+    results["get_initial_targets"] = summarize(time_calls(problem.get_initial_targets, [()] * 10_000))
+    return results
+
+def benchmark_pathfind(corpora: Sequence[str], **_: Any) -> Measurements:
+    """
+    Solves every maze of the given corpora, measuring the latency and expansion rate of
+    each, then solves them again under tracemalloc to find the peak memory of the search.
+
+    Parameters:
+        corpora (Sequence[str]):
+            The names of the corpora to solve.
+
+    Returns:
+        Measurements:
+            The summary of each corpus, by name.
+    """
+    results: Measurements = {}
+    for name in corpora:
+        problems = [MazeProblem(rows) for rows in load_corpus(name)]
+        stats = SearchStats()
+        times = time_calls(lambda problem: solve(problem, stats=stats), [(problem,) for problem in problems])
+        peak = 0
+        for rows in load_corpus(name):
+            problem = MazeProblem(rows)
+            tracemalloc.start()
+            solve(problem)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        results[f"pathfind[{name}]"] = summarize(
+            times,
+            expansions_per_s=stats.nodes_expanded / sum(times) if sum(times) else 0.0,
+            peak_kib=peak / 1024,
+        )
+    return results
+
+def benchmark_primitives(corpora: Sequence[str], seed: int = 0, samples: int = 2000, **_: Any) -> Measurements:
+    """
+    Measures the latency of MazeProblem's construction and of its queries, called with
+    random states of the mazes of the given corpora.
+
+    Parameters:
+        corpora (Sequence[str]):
+            The names of the corpora to query.
+        seed (int):
+            The seed of the random states.
+        samples (int):
+            The number of queries of each kind per corpus.
+
+    Returns:
+        Measurements:
+            The summary of each query and corpus, by name.
+    """
+    rng = random.Random(seed)
+    results: Measurements = {}
+    for name in corpora:
+        mazes = load_corpus(name)
+        problems = [MazeProblem(rows) for rows in mazes]
+        results[f"MazeProblem(rows)[{name}]"] = summarize(time_calls(MazeProblem, [(rows,) for rows in mazes]))
+        queries = []
+        for _sample in range(samples):
+            problem = rng.choice(problems)
+            (width, height) = problem.get_dimensions()
+            targets = problem.get_initial_targets()
+            remaining = set(rng.sample(sorted(targets), rng.randint(0, len(targets))))
+            queries.append((problem, (rng.randrange(width), rng.randrange(height)), remaining))
+        results[f"get_transitions[{name}]"] = summarize(time_calls(lambda problem, loc, remaining: problem.get_transitions(loc, remaining), queries))
+        results[f"get_visible_targets_from_loc[{name}]"] = summarize(time_calls(lambda problem, loc, remaining: problem.get_visible_targets_from_loc(loc, remaining), queries))
+    return results
+
+def benchmark_verify(corpora: Sequence[str], **_: Any) -> Measurements:
+    """
+    Measures how long checking the solutions of the given corpora takes, plan by plan with
+    test_solution and verify_solution, and all at once with verify_solutions.
+
+    Parameters:
+        corpora (Sequence[str]):
+            The names of the corpora whose solutions are checked.
+
+    Returns:
+        Measurements:
+            The summary of each way of checking and corpus, by name.
+    """
+    results: Measurements = {}
+    for name in corpora:
+        problems = [MazeProblem(rows) for rows in load_corpus(name)]
+        pairs = [(problem, solve(problem).solution) for problem in problems]
+        steps = sum(len(solution or ()) for (_, solution) in pairs)
+        for method in ("test_solution", "verify_solution"):
+            times = time_calls(lambda problem, solution: getattr(problem, method)(solution), pairs)
+            results[f"{method}[{name}]"] = summarize(times, ns_per_step=sum(times) * 1e9 / max(1, steps))
+        times = time_calls(verify_solutions, [(pairs,)])
+        results[f"verify_solutions[{name}]"] = summarize(times, ns_per_step=sum(times) * 1e9 / max(1, steps))
+    return results
+
+def benchmark_parallel(corpora: Sequence[str], workers: Sequence[int] = (1, 2, 4, 8, 16), **_: Any) -> Measurements:
+    """
+    Measures how solve_parallel scales with its number of worker processes on the mazes of
+    the given corpora, against solve on a single core. Its speedup is bounded both by the
+    number of cores available and by the extra nodes HDA* expands for lack of a global
+    frontier, reported as its expansion overhead.
+
+    Parameters:
+        corpora (Sequence[str]):
+            The names of the corpora to solve, preferably of large mazes.
+        workers (Sequence[int]):
+            The numbers of worker processes to measure.
+
+    Returns:
+        Measurements:
+            The summary of each corpus and number of workers, by name.
+    """
+    results: Measurements = {}
+    for name in corpora:
+        problems = [MazeProblem(rows) for rows in load_corpus(name)]
+        serial_expansions = 0
+        def serial(problem: MazeProblem) -> None:
+            nonlocal serial_expansions
+            serial_expansions += solve(problem).expansions
+        serial_times = time_calls(serial, [(problem,) for problem in problems])
+        results[f"solve[{name}]"] = summarize(serial_times)
+        for count in workers:
+            expansions = 0
+            def parallel(problem: MazeProblem) -> None:
+                nonlocal expansions
+                expansions += solve_parallel(problem, count).expansions
+            times = time_calls(parallel, [(problem,) for problem in problems])
+            results[f"solve_parallel[{name}, {count} workers]"] = summarize(
+                times,
+                speedup=sum(serial_times) / sum(times),
+                expansion_overhead=expansions / max(1, serial_expansions),
+            )
+    return results
+
+def benchmark_startup(corpora: Sequence[str], repeats: int = 5, **_: Any) -> Measurements:
+    """
+    Measures the cold start of fresh interpreters, as paid by command line workers on every
+    job: importing pathfinder alone, and solving the first maze of each of the given corpora
+    with `python -m pathfinder`, without and then with a warm --index-cache.
+
+    Parameters:
+        corpora (Sequence[str]):
+            The names of the corpora whose first maze is solved.
+        repeats (int):
+            The number of interpreters started per measurement.
+
+    Returns:
+        Measurements:
+            The summary of each measurement, by name.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    def run_python(*args: str) -> None:
+        subprocess.run([sys.executable, *args], cwd=directory, check=True, stdout=subprocess.DEVNULL)
+    results: Measurements = {}
+    results["import pathfinder"] = summarize(time_calls(run_python, [("-c", "import pathfinder")] * repeats))
+    with tempfile.TemporaryDirectory() as temp_directory:
+        for name in corpora:
+            maze_path = os.path.join(temp_directory, f"{name}.txt")
+            cache_path = os.path.join(temp_directory, f"{name}.index")
+            with open(maze_path, "w") as maze_file:
+                maze_file.write("\n".join(load_corpus(name)[0]))
+            results[f"python -m pathfinder[{name}]"] = summarize(time_calls(run_python, [("-m", "pathfinder", maze_path)] * repeats))
+            run_python("-m", "pathfinder", maze_path, "--index-cache", cache_path)
+            results[f"python -m pathfinder --index-cache[{name}]"] = summarize(
+                time_calls(run_python, [("-m", "pathfinder", maze_path, "--index-cache", cache_path)] * repeats)
+            )
+    return results
+
+BENCHMARKS: dict[str, Callable[..., Measurements]] = {
+    "construction": benchmark_construction,
+    "parallel": benchmark_parallel,
+    "pathfind": benchmark_pathfind,
+    "primitives": benchmark_primitives,
+    "startup": benchmark_startup,
+    "verify": benchmark_verify,
+}
+
+def run(names: Sequence[str], **options: Any) -> dict[str, Any]:
+    """
+    Runs the named benchmarks, printing their measurements as they complete.
+
+    Parameters:
+        names (Sequence[str]):
+            The keys of BENCHMARKS to run.
+        options (Any):
+            The options passed on to every benchmark (cells, repeats, seed, corpora, workers).
+
+    Returns:
+        dict[str, Any]:
+            The measurements of every benchmark along with a description of the machine, as
+            written by --json.
+    """
+    results: dict[str, Measurements] = {}
+    for name in names:
+        results[name] = BENCHMARKS[name](**options)
+        for (measurement, summary) in results[name].items():
+            report(measurement, summary)
+    return {
+        "meta": {
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "options": options,
+        },
+        "results": results,
+    }
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """
+    Runs the benchmarks named on the command line.
+
+    Parameters:
+        argv (Optional[list[str]]):
+            The command line arguments, defaulting to sys.argv[1:].
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("benchmarks", nargs="+", choices=sorted(BENCHMARKS))
+    parser.add_argument("--corpus", dest="corpora", nargs="+", choices=sorted(CORPORA), default=["small", "medium"], help="corpora to run on")
+    parser.add_argument("--cells", type=int, default=1_000_000, help="approximate size of the construction benchmark's maze")
+    parser.add_argument("--repeats", type=int, default=5, help="number of repeats of the construction and startup benchmarks")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random mazes and queries")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="worker counts of the parallel benchmark")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE as JSON")
+    args = parser.parse_args(argv)
+    results = run(args.benchmarks, corpora=args.corpora, cells=args.cells, repeats=args.repeats, seed=args.seed, workers=args.workers)
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+
+if __name__ == "__main__":
+    main()
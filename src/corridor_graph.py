@@ -0,0 +1,167 @@
+'''
+Corridor compression of a maze's movement graph, for mazes made mostly of corridors; it
+does nothing for open rooms (see below). Most tiles of a corridor are places the
+player only ever walks through: nothing can be decided there that could not be decided
+at either end. A CorridorGraph keeps only the tiles where something can happen, which it
+calls junctions, and links them by edges that walk a whole corridor at once, with the
+corridor's total cost and its actions; A* searching it (see pathfinder.solve's graph
+argument) expands one node per corridor rather than one per tile, and unfolds the
+corridors of its solution back into single U/D/L/R steps.
+
+A tile is a junction if it is:
+    - a decision point: a dead end, or a tile with 3 or 4 open neighbors;
+    - the player's starting tile, or a target's tile (which is impassable until shot);
+    - a tile seeing targets that one of its neighbors does not see, from where a shot may
+      hit something that shooting from the corridor's ends would not.
+Solutions stay optimal: every other tile is in a corridor whose tiles all see the same
+targets, which both of its ends see too, so any shot taken inside a corridor may as well
+be taken at the end the player came in from, and a plan never needs to turn around or
+stop within one. Mud needs no special treatment, since edges sum the cost of every tile
+they enter.
+
+Open rooms are not compressed: their tiles mostly have 3 or 4 open neighbors, so nearly all
+of them are junctions, and the graph is then about as large as the grid. On mazes mixing
+rooms with corridors, expansions drop only in proportion to the share of corridor tiles.
+Pruning symmetric paths across rooms, as jump point search does, is not attempted: it
+assumes uniform step costs, which mud breaks.
+'''
+from maze_problem import MazeProblem
+from constants import Constants
+from typing import *
+
+_UNKNOWN, _CORRIDOR, _JUNCTION = 0, 1, 2
+
+class CorridorGraph:
+    """
+    Corridor-compressed movement graph of a MazeProblem, built lazily: a tile is classified,
+    and a junction's edges are walked, only when a search first reaches them. The graph is
+    a snapshot of the maze's tiles, so it must be rebuilt after MazeProblem.set_tile.
+
+    Attributes:
+        actions (list[str]):
+            The action table of the graph's edges: Constants.MOVES, whose codes keep their
+            meaning, followed by the action string of every multi-step edge walked so far.
+    """
+    def __init__(self, problem: MazeProblem) -> None:
+        """
+        Prepares the compressed graph of the given problem.
+
+        Parameters:
+            problem (MazeProblem):
+                The maze whose movement graph is compressed.
+        """
+        self._problem = problem
+        (width, height) = problem.get_dimensions()
+        self._kinds = bytearray(width * height)
+        self._all_targets: int = problem.get_initial_target_mask()
+        self._start: int = problem.get_cell_id(problem.get_initial_loc())
+        self._edges: dict[int, tuple[tuple[int, int, int, int], ...]] = {}
+        self.actions: list[str] = list(Constants.MOVES)
+        self._action_codes: dict[str, int] = {action: code for (code, action) in enumerate(self.actions)}
+
+    def is_junction(self, cell: int) -> bool:
+        """
+        Tells whether the given open cell is a junction of the graph, rather than a tile
+        within a corridor.
+
+        Parameters:
+            cell (int):
+                The id of an open cell.
+
+        Returns:
+            bool:
+                True if the cell is kept in the compressed graph.
+        """
+        kind = self._kinds[cell]
+        if kind == _UNKNOWN:
+            kind = self._kinds[cell] = _JUNCTION if self._classify(cell) else _CORRIDOR
+        return kind == _JUNCTION
+
+    def _classify(self, cell: int) -> bool:
+        """
+        Works out whether the given open cell is a junction (see the module's description).
+
+        Parameters:
+            cell (int):
+                The id of an open cell.
+
+        Returns:
+            bool:
+                True if the cell is a junction.
+        """
+        problem = self._problem
+        moves = problem.get_moves(cell)
+        if len(moves) != 2 or cell == self._start or problem.get_target_mask([problem.get_cell_loc(cell)]):
+            return True
+        seen = problem.get_shot_mask(cell, self._all_targets)
+        return any(seen & ~problem.get_shot_mask(next_cell, self._all_targets) for (_, next_cell, _, _) in moves)
+
+    def get_moves(self, cell: int) -> tuple[tuple[int, int, int, int], ...]:
+        """
+        Counterpart of MazeProblem.get_moves on the compressed graph: returns the edges from
+        the given cell to the nearest junction in each direction, walking each corridor to
+        its end. Only the cheapest edge to each junction is kept, and corridors leading back
+        to the cell itself are dropped.
+
+        [!] Note: the returned tuple is shared between calls and must not be modified.
+
+        Parameters:
+            cell (int):
+                The id of the player's cell, usually a junction.
+
+        Returns:
+            tuple[tuple[int, int, int, int], ...]:
+                One (action_code, next_cell, cost, target_bit) tuple per edge, where
+                action_code indexes actions and target_bit is the bit of the target on
+                next_cell, or 0 if there is none.
+        """
+        edges = self._edges.get(cell)
+        if edges is not None:
+            return edges
+        problem = self._problem
+        cheapest: dict[int, tuple[int, int, int, int]] = {}
+        for (action_code, next_cell, cost, target_bit) in problem.get_moves(cell):
+            steps = [Constants.MOVES[action_code]]
+            (previous, current) = (cell, next_cell)
+            # Targets are junctions, so only the last tile of an edge may hold one
+            while current != cell and not target_bit and not self.is_junction(current):
+                (step_code, following, step_cost, target_bit) = next(move for move in problem.get_moves(current) if move[1] != previous)
+                steps.append(Constants.MOVES[step_code])
+                cost += step_cost
+                (previous, current) = (current, following)
+            if current == cell:
+                continue
+            best = cheapest.get(current)
+            if best is None or cost < best[2]:
+                cheapest[current] = (self._action_code("".join(steps)), current, cost, target_bit)
+        edges = self._edges[cell] = tuple(cheapest.values())
+        return edges
+
+    def _action_code(self, steps: str) -> int:
+        """
+        Returns the code of the given action string in actions, adding it if it is new.
+
+        Parameters:
+            steps (str):
+                The actions of an edge, one character per step.
+
+        Returns:
+            int:
+                The index of steps in actions.
+        """
+        code = self._action_codes.get(steps)
+        if code is None:
+            code = self._action_codes[steps] = len(self.actions)
+            self.actions.append(steps)
+        return code
+
+    def junction_count(self) -> int:
+        """
+        Returns the number of junctions classified so far, which is all those reachable from
+        the player once a search has run to completion on the graph.
+
+        Returns:
+            int:
+                The number of junctions found.
+        """
+        return self._kinds.count(_JUNCTION)
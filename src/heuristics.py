@@ -0,0 +1,433 @@
+'''
+Pluggable heuristics for the pathfinder's A* search. A heuristic is any callable taking a
+state's cell id and remaining-targets mask and returning a lower bound on the cost left to
+reach a goal state from it; returning UNREACHABLE marks the state as a dead end.
+'''
+from maze_problem import MazeProblem
+from constants import Constants
+from typing import *
+from array import array
+import heapq
+
+if TYPE_CHECKING:
+    from maze_numpy import NumpyMazeBackend
+
+UNREACHABLE: int = 1 << 30
+
+# Header of the files written by VantageDistances.save, followed by a digest of the maze, the
+# number of tables, and the tables themselves in the machine's native layout
+_CACHE_MAGIC: bytes = b"VDT1"
+
+# A distance table: an array of its own, or an "i"-format view of tables held in a shared
+# buffer (see VantageDistances.from_buffer)
+DistanceTable = Union[array, memoryview]
+
+class Heuristic(Protocol):
+    """
+    Interface shared by all heuristics accepted by pathfind.
+    """
+    def __call__(self, cell: int, targets_mask: int) -> int: ...
+
+class NullHeuristic:
+    """
+    The trivial heuristic h(n) = 0, turning A* into uniform cost search; useful as a baseline.
+    """
+    def __call__(self, cell: int, targets_mask: int) -> int:
+        return 0
+
+class LineHeuristic:
+    """
+    Cheap heuristic needing no precomputation: each target can only be shot from its own row
+    or column, so the player must at least move to the row or column of the farthest remaining
+    target, and fire at least once.
+    """
+    def __init__(self, problem: MazeProblem) -> None:
+        """
+        Parameters:
+            problem (MazeProblem):
+                The problem whose states will be estimated.
+        """
+        self._problem = problem
+        self._target_order = problem.get_target_order()
+
+    def __call__(self, cell: int, targets_mask: int) -> int:
+        if not targets_mask:
+            return 0
+        x, y = self._problem.get_cell_loc(cell)
+        farthest: int = 0
+        for i, (x_targ, y_targ) in enumerate(self._target_order):
+            if targets_mask >> i & 1:
+                farthest = max(farthest, min(abs(x_targ - x), abs(y_targ - y)))
+        return farthest + Constants.SHOOTING_COST
+
+def _maze_digest(problem: MazeProblem) -> bytes:
+    """
+    Returns a 16-byte digest of the given problem's tiles and width, identifying its maze in
+    the files written by VantageDistances.save.
+    """
+    import hashlib # deferred, as only the distance caches need it
+    (width, _) = problem.get_dimensions()
+    return hashlib.blake2b(width.to_bytes(4, "little") + problem.get_grid(), digest_size=16).digest()
+
+def _cache_header(problem: MazeProblem, table_count: int) -> bytes:
+    """
+    Returns the header preceding table_count distance tables of the given problem in the
+    layout of VantageDistances.save.
+    """
+    return _CACHE_MAGIC + _maze_digest(problem) + table_count.to_bytes(4, "little")
+
+class VantageDistances:
+    """
+    Per-target tables of the true cost of moving from any cell to the nearest cell from which
+    that target can be shot (its vantage cells), computed once per maze with one multi-source
+    Dijkstra pass per target. Remaining targets are treated as passable, so every entry is a
+    lower bound on the cost of reaching a vantage cell in any state.
+    """
+    def __init__(self, problem: MazeProblem) -> None:
+        """
+        Computes the distance table of every target in the given problem.
+
+        Parameters:
+            problem (MazeProblem):
+                The problem whose targets the tables are computed for.
+        """
+        self._problem = problem
+        self._tables: list[DistanceTable] = [self._compute_table(target) for target in problem.get_target_order()]
+
+    def _compute_table(self, target: tuple[int, int]) -> array:
+        """
+        Runs Dijkstra's algorithm backwards from every vantage cell of the given target.
+
+        Parameters:
+            target (tuple[int, int]):
+                The location of the target.
+
+        Returns:
+            array:
+                Cell-indexed distances to the nearest vantage cell, UNREACHABLE where there is none.
+        """
+        problem = self._problem
+        dist = array("i", [UNREACHABLE]) * problem.get_cell_count()
+        heap: list[tuple[int, int]] = []
+        for cell in problem.get_vantage_cells(target):
+            dist[cell] = 0
+            heap.append((0, cell))
+        self._propagate(dist, heap)
+        return dist
+
+    def repair(self, cell: int, old_cost: int) -> None:
+        """
+        Brings the tables up to date after the tile at the given cell changed (see
+        MazeProblem.set_tile), touching only the cells whose distances depend on it, except for
+        the targets in the tile's row or column, whose vantage cells may have changed and whose
+        tables are recomputed in full.
+
+        Parameters:
+            cell (int):
+                The cell id of the changed tile.
+            old_cost (int):
+                The cost of moving onto the tile before the change (0 if it was a wall).
+        """
+        problem = self._problem
+        new_cost = problem.get_cell_cost(cell)
+        if new_cost == old_cost:
+            return
+        (x, y) = problem.get_cell_loc(cell)
+        for (i, target) in enumerate(problem.get_target_order()):
+            if (not old_cost or not new_cost) and (target[0] == x or target[1] == y):
+                self._tables[i] = self._compute_table(target)
+            elif new_cost and (new_cost < old_cost or not old_cost):
+                self._repair_decrease(self._tables[i], cell)
+            else:
+                self._repair_increase(self._tables[i], cell, old_cost)
+
+    def _repair_decrease(self, dist: DistanceTable, cell: int) -> None:
+        """
+        Lowers the distances that can now be improved by passing through the given cell,
+        which became cheaper (or possible) to move onto.
+
+        Parameters:
+            dist (DistanceTable):
+                The distance table to repair in place.
+            cell (int):
+                The cell id of the changed tile.
+        """
+        problem = self._problem
+        dist[cell] = min([dist[cell]] + [dist[next_cell] + cost for _, next_cell, cost, _ in problem.get_moves(cell)])
+        self._propagate(dist, [(dist[cell], cell)])
+
+    def _repair_increase(self, dist: DistanceTable, cell: int, old_cost: int) -> None:
+        """
+        Raises the distances of the cells whose shortest route to a vantage cell may have
+        passed through the given cell, which became costlier (or impossible) to move onto: they
+        are cleared, then recomputed from the untouched cells around them.
+
+        Parameters:
+            dist (DistanceTable):
+                The distance table to repair in place.
+            cell (int):
+                The cell id of the changed tile.
+            old_cost (int):
+                The cost of moving onto the tile before the change.
+        """
+        problem = self._problem
+        if dist[cell] >= UNREACHABLE:
+            return
+        # A cell depends on cell if its distance is met exactly by stepping onto a cell that
+        # itself depends on cell; ties make this a superset of the true dependents, which is safe
+        affected = {cell}
+        stack = [(cell, old_cost)]
+        while stack:
+            (parent, parent_cost) = stack.pop()
+            through = dist[parent] + parent_cost
+            for _, next_cell, _, _ in problem.get_moves(parent):
+                if next_cell not in affected and dist[next_cell] == through:
+                    affected.add(next_cell)
+                    stack.append((next_cell, problem.get_cell_cost(next_cell)))
+        # The cell's own distance only depends on its neighbors, unless it is now a wall
+        affected.discard(cell)
+        if not problem.get_cell_cost(cell):
+            dist[cell] = UNREACHABLE
+        for affected_cell in affected:
+            dist[affected_cell] = UNREACHABLE
+        heap = [(min((dist[next_cell] + cost for _, next_cell, cost, _ in problem.get_moves(affected_cell)), default=UNREACHABLE), affected_cell) for affected_cell in affected]
+        heap = [(d, affected_cell) for (d, affected_cell) in heap if d < UNREACHABLE]
+        for (d, affected_cell) in heap:
+            dist[affected_cell] = d
+        heapq.heapify(heap)
+        self._propagate(dist, heap)
+
+    def _propagate(self, dist: DistanceTable, heap: list[tuple[int, int]]) -> None:
+        """
+        Runs the relaxation loop of Dijkstra's algorithm backwards from the given entries.
+
+        Parameters:
+            dist (DistanceTable):
+                The distance table to lower in place.
+            heap (list[tuple[int, int]]):
+                A heap of (distance, cell id) entries to start from.
+        """
+        problem = self._problem
+        while heap:
+            d, cell = heapq.heappop(heap)
+            if d > dist[cell]:
+                continue
+            # Moves are symmetric, so the cells reachable from cell are the ones that reach it,
+            # each paying the cost of stepping onto cell
+            step_cost = problem.get_cell_cost(cell)
+            for _, prev_cell, _, _ in problem.get_moves(cell):
+                if d + step_cost < dist[prev_cell]:
+                    dist[prev_cell] = d + step_cost
+                    heapq.heappush(heap, (d + step_cost, prev_cell))
+
+    def save(self, path: str) -> None:
+        """
+        Writes the tables to the given file, to be read back by load in a later process that
+        needs the same maze, rather than computing them again.
+
+        Parameters:
+            path (str):
+                The path of the file to write, replaced if it exists.
+        """
+        with open(path, "wb") as cache_file:
+            cache_file.write(_cache_header(self._problem, len(self._tables)))
+            for table in self._tables:
+                cache_file.write(table)
+
+    @classmethod
+    def load(cls, problem: MazeProblem, path: str) -> Optional["VantageDistances"]:
+        """
+        Reads the tables of the given problem from a file written by save, if it holds those
+        of the very same maze.
+
+        Parameters:
+            problem (MazeProblem):
+                The problem whose tables are wanted.
+            path (str):
+                The path of the file to read.
+
+        Returns:
+            Optional[VantageDistances]:
+                The tables read, or None if the file is missing, unreadable, or written for
+                another maze (or another version of this one).
+        """
+        cells = problem.get_cell_count()
+        target_count = len(problem.get_target_order())
+        tables: list[DistanceTable] = []
+        expected_header = _cache_header(problem, target_count)
+        try:
+            with open(path, "rb") as cache_file:
+                if cache_file.read(len(expected_header)) != expected_header:
+                    return None
+                for _ in range(target_count):
+                    table = array("i")
+                    table.fromfile(cache_file, cells)
+                    tables.append(table)
+        except (OSError, EOFError):
+            return None
+        distances = cls.__new__(cls)
+        distances._problem = problem
+        distances._tables = tables
+        return distances
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns the tables in the layout of the files written by save, e.g., to be copied into
+        shared memory once and read by from_buffer in other processes.
+
+        Returns:
+            bytes:
+                The header identifying the maze, followed by the tables.
+        """
+        return _cache_header(self._problem, len(self._tables)) + b"".join(table.tobytes() for table in self._tables)
+
+    @classmethod
+    def from_buffer(cls, problem: MazeProblem, buffer: memoryview) -> Optional["VantageDistances"]:
+        """
+        Wraps the tables of the given problem held in a buffer laid out by to_bytes, without
+        copying them: every table is a view of the buffer, which must stay open while the
+        tables are in use, and which repair would modify in place.
+
+        Parameters:
+            problem (MazeProblem):
+                The problem whose tables are wanted.
+            buffer (memoryview):
+                The buffer holding the tables, possibly followed by padding.
+
+        Returns:
+            Optional[VantageDistances]:
+                The tables, or None if the buffer holds those of another maze, or too few.
+        """
+        target_count = len(problem.get_target_order())
+        header = _cache_header(problem, target_count)
+        table_size = problem.get_cell_count() * array("i").itemsize
+        if bytes(buffer[:len(header)]) != header or len(buffer) < len(header) + target_count * table_size:
+            return None
+        distances = cls.__new__(cls)
+        distances._problem = problem
+        distances._tables = [
+            buffer[offset:offset + table_size].cast("i")
+            for offset in range(len(header), len(header) + target_count * table_size, table_size)
+        ]
+        return distances
+
+    @classmethod
+    def from_cache(cls, problem: MazeProblem, path: str) -> "VantageDistances":
+        """
+        Reads the tables of the given problem from a file written by save, or computes them
+        and saves them there if the file does not hold them.
+
+        Parameters:
+            problem (MazeProblem):
+                The problem whose tables are wanted.
+            path (str):
+                The path of the cache file.
+
+        Returns:
+            VantageDistances:
+                The tables of problem.
+        """
+        distances = cls.load(problem, path)
+        if distances is None:
+            distances = cls(problem)
+            distances.save(path)
+        return distances
+
+    def get_table(self, target_index: int) -> DistanceTable:
+        """
+        Returns the distance table of the target with the given ordinal.
+
+        Parameters:
+            target_index (int):
+                The target's ordinal (see MazeProblem.get_target_order).
+
+        Returns:
+            DistanceTable:
+                Cell-indexed distances to the nearest vantage cell, UNREACHABLE where there is none.
+        """
+        return self._tables[target_index]
+
+class VantageHeuristic:
+    """
+    Admissible and consistent heuristic combining VantageDistances tables: the player must at
+    least reach a vantage cell of the remaining target farthest from one, and must at least
+    fire ceil(remaining / most targets any single shot can hit) more times.
+    """
+    def __init__(self, problem: MazeProblem, distances: Optional[VantageDistances] = None, backend: Optional["NumpyMazeBackend"] = None) -> None:
+        """
+        Parameters:
+            problem (MazeProblem):
+                The problem whose states will be estimated.
+            distances (Optional[VantageDistances]):
+                Precomputed distance tables for problem, computed here if not given.
+            backend (Optional[NumpyMazeBackend]):
+                If given, used to find the most targets a single shot can hit with whole-grid
+                array operations instead of querying every vantage cell.
+        """
+        self._distances = distances if distances is not None else VantageDistances(problem)
+        self._tables = [self._distances.get_table(i) for i in range(len(problem.get_target_order()))]
+        initial_mask = problem.get_initial_target_mask()
+        if backend is not None:
+            self._max_hits: int = backend.max_shot_hits(initial_mask)
+        else:
+            vantage_cells = {cell for target in problem.get_target_order() for cell in problem.get_vantage_cells(target)}
+            self._max_hits = max((problem.get_shot_mask(cell, initial_mask).bit_count() for cell in vantage_cells), default=0)
+
+    def __call__(self, cell: int, targets_mask: int) -> int:
+        if not targets_mask:
+            return 0
+        farthest: int = 0
+        remaining: int = 0
+        mask = targets_mask
+        while mask:
+            low_bit = mask & -mask
+            farthest = max(farthest, self._tables[low_bit.bit_length() - 1][cell])
+            remaining += 1
+            mask ^= low_bit
+        if farthest >= UNREACHABLE or not self._max_hits:
+            return UNREACHABLE
+        return farthest + Constants.SHOOTING_COST * -(-remaining // self._max_hits)
+
+class SpanningTreeHeuristic:
+    """
+    Admissible (though not consistent) heuristic for mazes whose targets are spread out, in
+    which the player has to tour them one by one. Any walk reaching a vantage cell of every
+    remaining target links the player and those targets in a path, which weighs at least as
+    much as their minimum spanning tree, with edges weighted by the least cost of walking
+    between a vantage cell of one target and one of the other (in either direction). Each
+    call costs O(k^2) for k remaining targets, so this pays off when expansions are costly,
+    as in shot_planner, rather than in the step-by-step search of pathfind.
+    """
+    def __init__(self, problem: MazeProblem, distances: Optional[VantageDistances] = None) -> None:
+        """
+        Parameters:
+            problem (MazeProblem):
+                The problem whose states will be estimated.
+            distances (Optional[VantageDistances]):
+                Precomputed distance tables for problem, computed here if not given.
+        """
+        self._vantage = VantageHeuristic(problem, distances)
+        distances = self._vantage._distances
+        targets = problem.get_target_order()
+        self._tables = [distances.get_table(i) for i in range(len(targets))]
+        vantage_cells = [problem.get_vantage_cells(target) for target in targets]
+        between = [[min((table[cell] for cell in cells), default=UNREACHABLE) for cells in vantage_cells] for table in self._tables]
+        self._between: list[list[int]] = [[min(between[i][j], between[j][i]) for j in range(len(targets))] for i in range(len(targets))]
+
+    def __call__(self, cell: int, targets_mask: int) -> int:
+        lower_bound = self._vantage(cell, targets_mask)
+        if not targets_mask or lower_bound >= UNREACHABLE:
+            return lower_bound
+        remaining = [i for i in range(len(self._tables)) if targets_mask >> i & 1]
+        # Prim's algorithm, growing the tree from the player's cell
+        nearest = {i: self._tables[i][cell] for i in remaining}
+        tree_weight = 0
+        while nearest:
+            closest = min(nearest, key=nearest.__getitem__)
+            tree_weight += nearest.pop(closest)
+            between = self._between[closest]
+            for i in nearest:
+                if between[i] < nearest[i]:
+                    nearest[i] = between[i]
+        shots: int = lower_bound - max(self._tables[i][cell] for i in remaining)
+        return max(lower_bound, tree_weight + shots)
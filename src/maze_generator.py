@@ -0,0 +1,144 @@
+'''
+Seeded random maze generator and the fixed corpora of mazes used by the benchmarks, so
+that every run of a benchmark, on any machine or version, sees the very same mazes.
+'''
+from maze_problem import MazeProblem
+from constants import Constants
+from dataclasses import dataclass
+from typing import *
+import random
+
+def generate_maze(width: int, height: int, seed: int = 0, wall_density: float = 0.25, mud_density: float = 0.1,
+                  targets: int = 10, solvable: bool = False) -> list[str]:
+    """
+    Builds a random maze, walled all around, with the player on its top-left inner tile and
+    the targets on distinct random inner tiles. The same arguments always give the same maze.
+
+    Parameters:
+        width (int):
+            The length of each row, at least 3.
+        height (int):
+            The number of rows, at least 3.
+        seed (int):
+            The seed of the random number generator.
+        wall_density (float):
+            The fraction of inner tiles that are walls.
+        mud_density (float):
+            The fraction of inner tiles that are mud.
+        targets (int):
+            The number of targets, capped by the number of inner tiles left.
+        solvable (bool):
+            Whether to retry with derived seeds until the maze is solvable (see
+            MazeProblem.is_solvable).
+
+    Returns:
+        list[str]:
+            The rows of the maze.
+
+    Raises:
+        ValueError:
+            If the maze is smaller than 3x3 or the densities do not add up to at most 1.
+    """
+    if width < 3 or height < 3:
+        raise ValueError("mazes must be at least 3x3")
+    if wall_density < 0 or mud_density < 0 or wall_density + mud_density > 1:
+        raise ValueError("wall and mud densities must be non-negative and add up to at most 1")
+    rng = random.Random(seed)
+    while True:
+        rows = _random_rows(rng, width, height, wall_density, mud_density, targets)
+        if not solvable or MazeProblem(rows).is_solvable():
+            return rows
+
+def _random_rows(rng: random.Random, width: int, height: int, wall_density: float, mud_density: float, targets: int) -> list[str]:
+    """
+    Draws one random maze for generate_maze.
+
+    Parameters:
+        rng (random.Random):
+            The random number generator to draw from.
+        width (int):
+            The length of each row.
+        height (int):
+            The number of rows.
+        wall_density (float):
+            The fraction of inner tiles that are walls.
+        mud_density (float):
+            The fraction of inner tiles that are mud.
+        targets (int):
+            The number of targets.
+
+    Returns:
+        list[str]:
+            The rows of the maze.
+    """
+    (inner_width, inner_height) = (width - 2, height - 2)
+    blocks = [Constants.WALL_BLOCK, Constants.MUD_BLOCK, Constants.SAFE_BLOCK]
+    weights = [wall_density, mud_density, 1 - wall_density - mud_density]
+    inner = [rng.choices(blocks, weights, k=inner_width) for _ in range(inner_height)]
+    inner[0][0] = Constants.PLR_BLOCK
+    for cell in rng.sample(range(1, inner_width * inner_height), min(targets, inner_width * inner_height - 1)):
+        inner[cell // inner_width][cell % inner_width] = Constants.TARG_BLOCK
+    border = Constants.WALL_BLOCK * width
+    return [border] + [Constants.WALL_BLOCK + "".join(row) + Constants.WALL_BLOCK for row in inner] + [border]
+
+@dataclass(slots=True, frozen=True)
+class CorpusSpec:
+    """
+    Recipe of a benchmark corpus: a number of solvable mazes of the same shape, generated
+    from consecutive seeds.
+
+    Attributes:
+        size (int):
+            The number of mazes.
+        width (int):
+            The width of every maze.
+        height (int):
+            The height of every maze.
+        targets (int):
+            The number of targets in every maze.
+        wall_density (float):
+            The fraction of inner tiles that are walls.
+        mud_density (float):
+            The fraction of inner tiles that are mud.
+        first_seed (int):
+            The seed of the first maze.
+    """
+    size: int
+    width: int
+    height: int
+    targets: int
+    wall_density: float = 0.25
+    mud_density: float = 0.1
+    first_seed: int = 0
+
+# The fixed corpora: changing any of these invalidates comparisons with earlier results, so
+# add new corpora rather than editing existing ones
+CORPORA: dict[str, CorpusSpec] = {
+    "small": CorpusSpec(size=50, width=10, height=10, targets=4),
+    "medium": CorpusSpec(size=20, width=25, height=25, targets=6),
+    "large": CorpusSpec(size=5, width=200, height=200, targets=4, wall_density=0.2),
+    "many-targets": CorpusSpec(size=10, width=15, height=15, targets=10, wall_density=0.3),
+    "open": CorpusSpec(size=10, width=60, height=60, targets=5, wall_density=0.05, mud_density=0.2),
+}
+
+def load_corpus(name: str) -> list[list[str]]:
+    """
+    Generates the mazes of the named corpus.
+
+    Parameters:
+        name (str):
+            One of the keys of CORPORA.
+
+    Returns:
+        list[list[str]]:
+            The rows of each maze of the corpus, in order.
+
+    Raises:
+        KeyError:
+            If there is no such corpus.
+    """
+    spec = CORPORA[name]
+    return [
+        generate_maze(spec.width, spec.height, spec.first_seed + i, spec.wall_density, spec.mud_density, spec.targets, solvable=True)
+        for i in range(spec.size)
+    ]
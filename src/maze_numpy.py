@@ -0,0 +1,191 @@
+'''
+Optional NumPy backend computing whole-grid maps of a MazeProblem in bulk, replacing
+per-cell Python loops over MazeProblem's queries. NumPy is only imported when a
+NumpyMazeBackend is constructed, so the rest of the package works without it.
+'''
+from maze_problem import MazeProblem
+from constants import Constants
+from typing import *
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy import ndarray
+
+class NumpyMazeBackend:
+    """
+    Holds a MazeProblem's grid as a 2D uint8 array (indexed [row, col], i.e., [y, x]) along
+    with the row and column segment labels of every tile, from which cost and visibility
+    maps are computed with array operations.
+
+    The grid is a live view of the problem's tiles; the wall map and segment labels derived
+    from it are recomputed whenever the problem has changed through MazeProblem.set_tile.
+    """
+    def __init__(self, problem: MazeProblem) -> None:
+        """
+        Wraps the given problem's grid, without copying it.
+
+        Parameters:
+            problem (MazeProblem):
+                The problem to compute maps for.
+
+        Raises:
+            ImportError:
+                If NumPy is not installed.
+        """
+        try:
+            import numpy
+        except ImportError as error:
+            raise ImportError("NumpyMazeBackend requires NumPy; install it with `pip install numpy`") from error
+        self._np = numpy
+        self._problem = problem
+        (width, height) = problem.get_dimensions()
+        self.grid: "np.ndarray" = numpy.frombuffer(problem.get_grid(), dtype=numpy.uint8).reshape(height, width)
+        self._version = -1
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """
+        Recomputes the wall map and segment labels if the problem has changed since they
+        were last computed.
+        """
+        if self._version == self._problem.get_version():
+            return
+        self._version = self._problem.get_version()
+        self._is_open: "np.ndarray" = self.grid != ord(Constants.WALL_BLOCK)
+        self._row_seg: "np.ndarray" = self._label_runs(self._is_open)
+        self._col_seg: "np.ndarray" = self._label_runs(self._is_open.T).T
+
+    @property
+    def is_open(self) -> "np.ndarray":
+        """
+        2D boolean array, True for non-wall tiles, indexed [y, x].
+        """
+        self._refresh()
+        return self._is_open
+
+    @property
+    def row_seg(self) -> "np.ndarray":
+        """
+        2D int64 array of the id of every tile's run of non-wall tiles along its row, -1 on
+        walls, indexed [y, x].
+        """
+        self._refresh()
+        return self._row_seg
+
+    @property
+    def col_seg(self) -> "np.ndarray":
+        """
+        2D int64 array of the id of every tile's run of non-wall tiles along its column, -1
+        on walls, indexed [y, x].
+        """
+        self._refresh()
+        return self._col_seg
+
+    def _label_runs(self, is_open: "np.ndarray") -> "np.ndarray":
+        """
+        Labels every tile with a grid-wide unique id of the run of non-wall tiles it belongs
+        to along its row, using a cumulative sum over the starts of runs; walls get -1.
+
+        Parameters:
+            is_open (np.ndarray):
+                2D boolean array, True for non-wall tiles.
+
+        Returns:
+            np.ndarray:
+                2D int64 array of run ids, of the same shape as is_open.
+        """
+        np = self._np
+        was_open = np.zeros_like(is_open)
+        was_open[:, 1:] = is_open[:, :-1]
+        run_starts = is_open & ~was_open
+        labels = np.cumsum(run_starts.ravel()).reshape(is_open.shape) - 1
+        runs: "ndarray" = np.where(is_open, labels, -1)
+        return runs
+
+    def cost_map(self) -> "np.ndarray":
+        """
+        Returns the cost of moving onto every tile: MUD_TILE_COST on mud, 1 on other non-wall
+        tiles and 0 on walls, matching MazeProblem.get_cell_cost.
+
+        Returns:
+            np.ndarray:
+                2D uint8 array of costs, indexed [y, x].
+        """
+        np = self._np
+        costs: "ndarray" = np.where(self.grid == ord(Constants.MUD_BLOCK), Constants.MUD_TILE_COST, 1).astype(np.uint8)
+        costs[~self.is_open] = 0
+        return costs
+
+    def target_map(self, targets_mask: int) -> "np.ndarray":
+        """
+        Returns a boolean map of the tiles holding the remaining targets.
+
+        Parameters:
+            targets_mask (int):
+                The mask of remaining targets.
+
+        Returns:
+            np.ndarray:
+                2D boolean array, True on each remaining target, indexed [y, x].
+        """
+        targets = self._np.zeros(self.grid.shape, dtype=bool)
+        for (i, (x, y)) in enumerate(self._problem.get_target_order()):
+            if targets_mask >> i & 1:
+                targets[y, x] = True
+        return targets
+
+    def shot_count_map(self, targets_mask: int) -> "np.ndarray":
+        """
+        Returns, for every tile, how many of the remaining targets a shot from it would hit,
+        matching the size of MazeProblem.get_visible_target_mask: the targets in its row
+        segment plus those in its column segment, minus the one on the tile itself if any
+        (which is in both).
+
+        Parameters:
+            targets_mask (int):
+                The mask of remaining targets.
+
+        Returns:
+            np.ndarray:
+                2D int64 array of target counts, 0 on walls, indexed [y, x].
+        """
+        np = self._np
+        targets = self.target_map(targets_mask)
+        segment_count = int(max(self.row_seg.max(initial=-1), self.col_seg.max(initial=-1))) + 1
+        open_cells = self.is_open
+        row_totals = np.bincount(self.row_seg[open_cells], weights=targets[open_cells], minlength=segment_count)
+        col_totals = np.bincount(self.col_seg[open_cells], weights=targets[open_cells], minlength=segment_count)
+        counts: "ndarray" = np.zeros(self.grid.shape, dtype=np.int64)
+        counts[open_cells] = (row_totals[self.row_seg[open_cells]] + col_totals[self.col_seg[open_cells]]).astype(np.int64) - targets[open_cells]
+        return counts
+
+    def shootable_map(self, targets_mask: int, k: int = 1) -> "np.ndarray":
+        """
+        Returns a boolean map of the tiles from which a single shot would hit at least k of
+        the remaining targets.
+
+        Parameters:
+            targets_mask (int):
+                The mask of remaining targets.
+            k (int):
+                The least number of targets a shot must hit.
+
+        Returns:
+            np.ndarray:
+                2D boolean array, indexed [y, x].
+        """
+        return self.shot_count_map(targets_mask) >= k
+
+    def max_shot_hits(self, targets_mask: int) -> int:
+        """
+        Returns the most remaining targets that any single shot in the maze could hit.
+
+        Parameters:
+            targets_mask (int):
+                The mask of remaining targets.
+
+        Returns:
+            int:
+                The largest value of shot_count_map(targets_mask).
+        """
+        return int(self.shot_count_map(targets_mask).max(initial=0))
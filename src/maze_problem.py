@@ -1,5 +1,18 @@
 from constants import *
-import copy
+from array import array
+from collections import deque
+import itertools
+import mmap
+import os
+
+_WALL: bytes = Constants.WALL_BLOCK.encode()
+_TARGET: bytes = Constants.TARG_BLOCK.encode()
+_IS_OPEN: bytes = bytes(int(byte != _WALL[0]) for byte in range(256))
+_MOVE_OFFSETS: dict[str, tuple[int, int]] = {action: offset for (action, offset) in Constants.MOVE_DIRS.items() if action != "S"}
+_ENTER_COSTS: bytes = bytes(
+    0 if byte == _WALL[0] else Constants.MUD_TILE_COST if byte == Constants.MUD_BLOCK.encode()[0] else 1
+    for byte in range(256)
+)
 
 class MazeProblem:
     """
@@ -14,37 +27,179 @@ class MazeProblem:
     
     # Constructor
     # ---------------------------------------------------------------------------
-    def __init__(self, maze: list[str]) -> None:
+    def __init__(self, maze: Iterable[Union[str, bytes]]) -> None:
         """
         Constructs a new pathfinding problem (finding the locations of any
         relevant maze entities) from a maze specified as a list of string rows.
         
         Parameters:
-            maze (list[str]):
+            maze (Iterable[Union[str, bytes]]):
                 A list of string rows of a rectangular maze consisting of the
                 following traits:
                 - A border of walls ("X"), with possibly others in the maze
                 - Exactly 1 player starting position ("@")
                 - Some number [0-infinity] of targets to shoot ("T")
                 - Some number [0-infinity] of mud tiles
+                Rows may also be given as bytes, and as any iterable, e.g., the lines
+                of a file; shorter rows are padded with walls.
+        
+        Raises:
+            ValueError:
+                If the maze has no player starting position.
+        """
+        rows = [row.encode("ascii") if isinstance(row, str) else bytes(row) for row in maze]
+        rows = [row.rstrip(b"\r\n") for row in rows]
+        width = max((len(row) for row in rows), default=0)
+        self._load(bytearray(b"".join(row.ljust(width, _WALL) for row in rows)), width)
+        
+    @classmethod
+    def from_file(cls, path: str) -> "MazeProblem":
+        """
+        Constructs a new pathfinding problem from a maze file with one row per line, reading
+        it through mmap straight into the problem's compact byte grid rather than through
+        Python strings, so that very large mazes load in time and memory proportional to
+        their size in bytes.
+        
+        Parameters:
+            path (str):
+                The path of the maze file; all of its lines must have the same length and
+                end alike, in "\n" or in "\r\n".
+        
+        Returns:
+            MazeProblem:
+                The problem described by the file.
+        
+        Raises:
+            ValueError:
+                If the file is empty, if the rows of the maze are not all of the same
+                length (unlike the constructor, which pads short rows), or if the maze has
+                no player starting position.
+        """
+        with open(path, "rb") as maze_file:
+            if os.fstat(maze_file.fileno()).st_size == 0:
+                raise ValueError(f"maze file {path} is empty")
+            with mmap.mmap(maze_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                first_line_end = mapped.find(b"\n")
+                eol = b"\r\n" if first_line_end > 0 and mapped[first_line_end - 1] == ord("\r") else b"\n"
+                width = first_line_end + 1 - len(eol) if first_line_end >= 0 else len(mapped)
+                # Every line must end exactly one row further, and an unterminated last line
+                # must be a whole row: a ragged file whose total length happens to be a
+                # multiple of the width would otherwise load fine, with its rows split at the
+                # wrong places
+                (line_end, last_line_end) = (first_line_end, -1)
+                while line_end >= 0:
+                    if (line_end + 1) % (width + len(eol)) or mapped[line_end + 1 - len(eol):line_end + 1] != eol:
+                        raise ValueError(f"maze file {path} is not rectangular")
+                    (line_end, last_line_end) = (mapped.find(b"\n", line_end + 1), line_end)
+                if len(mapped) - (last_line_end + 1) not in (0, width):
+                    raise ValueError(f"maze file {path} is not rectangular")
+                grid = bytearray(mapped).translate(None, b"\r\n")
+        if not width:
+            raise ValueError(f"maze file {path} is empty")
+        if len(grid) % width:
+            raise ValueError(f"maze file {path} is not rectangular")
+        problem = cls.__new__(cls)
+        problem._load(grid, width)
+        return problem
+    
+    def _load(self, grid: bytearray, width: int) -> None:
+        """
+        Finds the maze's entities and builds its lookup tables from its raw byte grid.
+        
+        Parameters:
+            grid (bytearray):
+                The maze's rows, concatenated, one byte per tile.
+            width (int):
+                The length of each row.
+        
+        Raises:
+            ValueError:
+                If the maze has no player starting position.
+        """
+        player_cell = grid.find(Constants.PLR_BLOCK.encode())
+        if player_cell < 0:
+            raise ValueError("maze has no player")
+        self._grid: bytearray = grid
+        self._width: int = width
+        self._height: int = len(grid) // width if width else 0
+        self._player_loc: tuple[int, int] = self.get_cell_loc(player_cell)
+        target_cells: list[int] = []
+        cell = grid.find(_TARGET)
+        while cell >= 0:
+            target_cells.append(cell)
+            cell = grid.find(_TARGET, cell + 1)
+        
+        # Target ordinals: bit i of a targets mask stands for self._target_order[i]; targets are
+        # kept immutable so that they can be handed out without copying
+        self._target_order: tuple[tuple[int, int], ...] = tuple(sorted(map(self.get_cell_loc, target_cells)))
+        self._targets: frozenset[tuple[int, int]] = frozenset(self._target_order)
+        self._target_bits: dict[tuple[int, int], int] = {loc: 1 << i for (i, loc) in enumerate(self._target_order)}
+        self._target_cell_bits: dict[int, int] = {self.get_cell_id(loc): bit for (loc, bit) in self._target_bits.items()}
+        
+        # Transition table: the cost of stepping onto each cell (0 for walls), from which the
+        # moves out of a cell are derived once, on first request, and cached by cell id
+        self._enter_cost: bytearray = grid.translate(_ENTER_COSTS)
+        self._move_table: dict[int, tuple[tuple[int, int, int, int], ...]] = {}
+        self._solvable: Optional[bool] = None
+        self._version: int = 0
+        
+        # Visibility index: every non-wall cell is labeled with the wall-bounded row
+        # and column segment it sits in, and each segment remembers the targets in it,
+        # so that shooting queries become two lookups instead of a walk per target
+        is_open = grid.translate(_IS_OPEN)
+        self._row_seg: array = self._label_runs(is_open, self._width)
+        self._col_seg: array = array("i", bytes(4 * len(grid)))
+        col_runs = self._label_runs(b"".join(is_open[col::self._width] for col in range(self._width)), self._height)
+        for col in range(self._width):
+            self._col_seg[col::self._width] = col_runs[col * self._height:(col + 1) * self._height]
+        self._row_seg_targets: dict[int, frozenset[tuple[int, int]]] = self._group_targets(self._row_seg)
+        self._col_seg_targets: dict[int, frozenset[tuple[int, int]]] = self._group_targets(self._col_seg)
+        self._row_seg_masks: dict[int, int] = {seg: self.get_target_mask(targets) for (seg, targets) in self._row_seg_targets.items()}
+        self._col_seg_masks: dict[int, int] = {seg: self.get_target_mask(targets) for (seg, targets) in self._col_seg_targets.items()}
+        self._next_seg_id: int = len(grid)
+        
+    def _label_runs(self, is_open: bytes | bytearray, line_length: int) -> array:
+        """
+        Labels every tile of a sequence of lines (rows or columns of the maze) with the id of
+        the run of non-wall tiles it belongs to, counting the runs that start at or before it.
+        The starts of runs are found with whole-grid big-integer arithmetic and counted with
+        itertools.accumulate, so that no Python code runs per tile. Wall tiles are labeled
+        like the run before them and must be told apart through the enter costs.
+        
+        Parameters:
+            is_open (bytes | bytearray):
+                The lines, concatenated, with a byte of 1 for every non-wall tile and 0 otherwise.
+            line_length (int):
+                The length of each line.
+        
+        Returns:
+            array:
+                The run id of every tile, in the same order as is_open.
+        """
+        if not is_open:
+            return array("i")
+        was_open = bytearray(1) + is_open[:-1]
+        was_open[::line_length] = bytes(len(is_open) // line_length)
+        open_bits = int.from_bytes(is_open, "big")
+        run_starts = open_bits - (open_bits & int.from_bytes(was_open, "big"))
+        return array("i", itertools.accumulate(run_starts.to_bytes(len(is_open), "big")))
+    
+    def _group_targets(self, seg_ids: array) -> dict[int, frozenset[tuple[int, int]]]:
         """
-        self._maze: list[list[str]] = [[r for r in row] for row in maze]
-        self._targets: set[tuple[int, int]] = set()
-        self._walls: set[tuple[int, int]] = set()
-        self._mud: set[tuple[int, int]] = set()
+        Groups the maze's targets by the segment they sit in.
         
-        for (row_num, row) in enumerate(maze):
-            for (col_num, cell) in enumerate(row):
-                loc = (col_num, row_num)
-                if cell == Constants.TARG_BLOCK:
-                    self._targets.add(loc)
-                if cell == Constants.WALL_BLOCK:
-                    self._walls.add(loc)
-                if cell == Constants.MUD_BLOCK:
-                    self._mud.add(loc)
-                if cell == Constants.PLR_BLOCK:
-                    self._player_loc: tuple[int, int] = loc
+        Parameters:
+            seg_ids (array):
+                The cell-indexed segment ids of either the rows or the columns of the maze.
         
+        Returns:
+            dict[int, frozenset[tuple[int, int]]]:
+                For every segment containing targets, the set of those targets.
+        """
+        groups: dict[int, list[tuple[int, int]]] = {}
+        for loc in self._target_order:
+            groups.setdefault(seg_ids[self.get_cell_id(loc)], []).append(loc)
+        return {seg: frozenset(targets) for (seg, targets) in groups.items()}
     
     # Methods
     # ---------------------------------------------------------------------------
@@ -58,20 +213,162 @@ class MazeProblem:
         """
         return self._player_loc
     
-    def get_initial_targets (self) -> set[tuple[int, int]]:
+    def get_initial_targets (self) -> frozenset[tuple[int, int]]:
         """
         Returns the (possibly empty) set of targets that the player must shoot to
         reach a goal state.
         
         [!] Note: this method ALWAYS returns the starting set of target locations;
         you must record-keep separately any *remaining* targets of those unshot
-        during the course of search.
+        during the course of search. The set is shared between calls, and so is
+        immutable: copy it into a set to modify it.
         
         Returns:
-            set[tuple[int, int]]:
+            frozenset[tuple[int, int]]:
                 A set of each target's location in the maze: (col, row) = (x, y).
         """
-        return copy.deepcopy(self._targets)
+        return self._targets
+    
+    def get_cell_id(self, loc: tuple[int, int]) -> int:
+        """
+        Returns the flat cell id of the given location, which packs a location into a single
+        int for compact, hashable search states.
+        
+        Parameters:
+            loc (tuple[int, int]):
+                A location in the maze: (col, row) = (x, y).
+        
+        Returns:
+            int:
+                The index of loc in the maze's row-major cells, or -1 if it lies outside the maze.
+        """
+        if not (0 <= loc[0] < self._width and 0 <= loc[1] < self._height):
+            return -1
+        return loc[1] * self._width + loc[0]
+    
+    def get_cell_loc(self, cell: int) -> tuple[int, int]:
+        """
+        Returns the location of the given flat cell id; the inverse of get_cell_id.
+        
+        Parameters:
+            cell (int):
+                A cell id as returned by get_cell_id.
+        
+        Returns:
+            tuple[int, int]:
+                The location of that cell in the maze: (col, row) = (x, y).
+        """
+        return (cell % self._width, cell // self._width)
+    
+    def get_dimensions(self) -> tuple[int, int]:
+        """
+        Returns the size of the maze.
+        
+        Returns:
+            tuple[int, int]:
+                The maze's (width, height), i.e., its number of columns and rows.
+        """
+        return (self._width, self._height)
+    
+    def get_grid(self) -> memoryview:
+        """
+        Returns a read-only view of the maze's contents, one byte per tile (the characters of
+        Constants' *_BLOCK values), row after row, indexed by cell id; no copy is made.
+        
+        Returns:
+            memoryview:
+                The maze's tiles in row-major order.
+        """
+        return memoryview(self._grid).toreadonly()
+    
+    def get_version(self) -> int:
+        """
+        Returns the number of tiles changed by set_tile so far, so that views derived from
+        the maze's grid can tell when they have gone stale.
+        
+        Returns:
+            int:
+                The number of changes made to the maze since it was constructed.
+        """
+        return self._version
+    
+    def get_cell_count(self) -> int:
+        """
+        Returns the number of cells in the maze, i.e., one more than the largest cell id.
+        
+        Returns:
+            int:
+                The width times the height of the maze.
+        """
+        return len(self._enter_cost)
+    
+    def get_cell_cost(self, cell: int) -> int:
+        """
+        Returns the cost of moving onto the given cell, i.e., get_transition_cost of any movement
+        action that ends there, or 0 if the cell is a wall.
+        
+        Parameters:
+            cell (int):
+                A cell id as returned by get_cell_id.
+        
+        Returns:
+            int:
+                3 for mud tiles, 1 for other non-wall tiles, and 0 for walls.
+        """
+        return self._enter_cost[cell]
+    
+    def get_initial_target_mask(self) -> int:
+        """
+        Returns the bitmask equivalent of get_initial_targets, in which bit i is set for the
+        target with ordinal i (see get_target_order).
+        
+        Returns:
+            int:
+                The mask of all targets in the maze.
+        """
+        return (1 << len(self._target_order)) - 1
+    
+    def get_target_order(self) -> tuple[tuple[int, int], ...]:
+        """
+        Returns the locations of all targets in the maze, ordered by their ordinal, i.e., the
+        bit that stands for them in a targets mask.
+        
+        Returns:
+            tuple[tuple[int, int], ...]:
+                Each target's location, where index i is the target represented by bit i.
+        """
+        return self._target_order
+    
+    def get_target_mask(self, targets: Iterable[tuple[int, int]]) -> int:
+        """
+        Converts a collection of target locations into a targets mask.
+        
+        Parameters:
+            targets (Iterable[tuple[int, int]]):
+                Locations of targets in the maze; non-target locations are ignored.
+        
+        Returns:
+            int:
+                The mask with the bit of every given target set.
+        """
+        mask = 0
+        for loc in targets:
+            mask |= self._target_bits.get(loc, 0)
+        return mask
+    
+    def get_targets_from_mask(self, targets_mask: int) -> set[tuple[int, int]]:
+        """
+        Converts a targets mask back into the set of target locations it stands for.
+        
+        Parameters:
+            targets_mask (int):
+                A mask of targets, as returned by get_target_mask.
+        
+        Returns:
+            set[tuple[int, int]]:
+                The location of every target whose bit is set in targets_mask.
+        """
+        return {loc for (i, loc) in enumerate(self._target_order) if targets_mask >> i & 1}
     
     def get_transition_cost(self, action: str, player_loc: tuple[int, int]) -> int:
         """
@@ -95,10 +392,11 @@ class MazeProblem:
                     - 1 otherwise
         """
         if action == "S": return Constants.SHOOTING_COST
-        if player_loc in self._mud: return Constants.MUD_TILE_COST
+        cell = self.get_cell_id(player_loc)
+        if cell >= 0 and self._enter_cost[cell]: return self._enter_cost[cell]
         return 1
     
-    def get_visible_targets_from_loc(self, player_loc: tuple[int, int], targets_left: set[tuple[int, int]]) -> set[tuple[int, int]]:
+    def get_visible_targets_from_loc(self, player_loc: tuple[int, int], targets_left: AbstractSet[tuple[int, int]]) -> set[tuple[int, int]]:
         """
         Returns the set of targets that would be hit by a player taking the shoot action from
         the given player_loc from amongst those targets remaining in the targets_left parameter.
@@ -111,7 +409,7 @@ class MazeProblem:
         Parameters:
             player_loc (tuple[int, int]):
                 The current location of the player / the location from which they are shooting.
-            targets_left (set[tuple[int, int]])
+            targets_left (AbstractSet[tuple[int, int]])
                 A set of location tuples indicating the positions of remaining targets to shoot.
         
         Returns:
@@ -119,15 +417,231 @@ class MazeProblem:
                 The set of target locations that would be hit by taking the shoot action from the
                 given player_loc.
         """
-        p_loc = player_loc
-        targets_hit = set()
-        for target in targets_left:
-            if ((p_loc[0] == target[0] and not {(p_loc[0], row) for row in range(p_loc[1], target[1], 1 if p_loc[1] < target[1] else -1)}.intersection(self._walls)) or
-                (p_loc[1] == target[1] and not {(col, p_loc[1]) for col in range(p_loc[0], target[0], 1 if p_loc[0] < target[0] else -1)}.intersection(self._walls))):
-                targets_hit.add(target)
+        cell = self.get_cell_id(player_loc)
+        if cell < 0 or not self._enter_cost[cell]:
+            return set()
+        targets_hit = set(self._row_seg_targets.get(self._row_seg[cell], ()))
+        targets_hit.update(self._col_seg_targets.get(self._col_seg[cell], ()))
+        targets_hit.intersection_update(targets_left)
         return targets_hit
                 
-    def get_transitions(self, player_loc: tuple[int, int], targets_left: set[tuple[int, int]]) -> dict:
+    def get_visible_target_mask(self, player_loc: tuple[int, int], targets_mask: int) -> int:
+        """
+        Bitmask counterpart of get_visible_targets_from_loc: returns the mask of targets that
+        would be hit by shooting from player_loc among those remaining in targets_mask.
+        
+        Parameters:
+            player_loc (tuple[int, int]):
+                The current location of the player / the location from which they are shooting.
+            targets_mask (int):
+                The mask of remaining targets to shoot.
+        
+        Returns:
+            int:
+                The mask of targets that would be hit by taking the shoot action from player_loc.
+        """
+        return self.get_shot_mask(self.get_cell_id(player_loc), targets_mask)
+    
+    def get_shot_mask(self, cell: int, targets_mask: int) -> int:
+        """
+        Cell-id counterpart of get_visible_target_mask, for use alongside get_moves.
+        
+        Parameters:
+            cell (int):
+                The cell id from which the player is shooting.
+            targets_mask (int):
+                The mask of remaining targets to shoot.
+        
+        Returns:
+            int:
+                The mask of targets that would be hit by taking the shoot action from cell.
+        """
+        if cell < 0 or not self._enter_cost[cell]:
+            return 0
+        return (self._row_seg_masks.get(self._row_seg[cell], 0) | self._col_seg_masks.get(self._col_seg[cell], 0)) & targets_mask
+    
+    def is_solvable(self, player_loc: Optional[tuple[int, int]] = None, targets_mask: Optional[int] = None) -> bool:
+        """
+        Determines, without searching, whether every target can eventually be shot. Starting
+        from the player, a flood fill reaches every tile it can, treating remaining targets as
+        obstacles; every tile reached shoots all the targets it can see, and each target so
+        destroyed opens its tile to the fill if the fill has already reached one of its
+        neighbors. Each tile, row / column segment and target is visited at most once, so this
+        runs in time linear in the size of the maze. The answer for the initial state is
+        computed on the first call and cached.
+        
+        Parameters:
+            player_loc (Optional[tuple[int, int]]):
+                The location to start from, if not the player's initial location.
+            targets_mask (Optional[int]):
+                The mask of targets remaining, if not all of them.
+        
+        Returns:
+            bool:
+                True if some sequence of actions shoots every target, False otherwise.
+        """
+        is_initial_state = player_loc is None and targets_mask is None
+        if is_initial_state and self._solvable is not None:
+            return self._solvable
+        all_targets = self.get_initial_target_mask()
+        targets_mask = all_targets if targets_mask is None else targets_mask
+        target_cells = [self.get_cell_id(loc) for loc in self._target_order]
+        reached = bytearray(len(self._enter_cost))
+        seen_row_segs: set[int] = set()
+        seen_col_segs: set[int] = set()
+        blocked_targets: set[int] = set()
+        destroyed = all_targets & ~targets_mask
+        start = self.get_cell_id(self._player_loc if player_loc is None else player_loc)
+        reached[start] = 1
+        frontier = deque([start])
+        while frontier:
+            cell = frontier.popleft()
+            for (_, next_cell, _, target_bit) in self.get_moves(cell):
+                if target_bit & ~destroyed:
+                    blocked_targets.add(next_cell)
+                elif not reached[next_cell]:
+                    reached[next_cell] = 1
+                    frontier.append(next_cell)
+            
+            # Shoot along this tile's row and column, unless some reached tile already has
+            newly_destroyed = 0
+            if self._row_seg[cell] not in seen_row_segs:
+                seen_row_segs.add(self._row_seg[cell])
+                newly_destroyed |= self._row_seg_masks.get(self._row_seg[cell], 0)
+            if self._col_seg[cell] not in seen_col_segs:
+                seen_col_segs.add(self._col_seg[cell])
+                newly_destroyed |= self._col_seg_masks.get(self._col_seg[cell], 0)
+            newly_destroyed &= ~destroyed
+            destroyed |= newly_destroyed
+            while newly_destroyed:
+                low_bit = newly_destroyed & -newly_destroyed
+                target_cell = target_cells[low_bit.bit_length() - 1]
+                if target_cell in blocked_targets and not reached[target_cell]:
+                    reached[target_cell] = 1
+                    frontier.append(target_cell)
+                newly_destroyed ^= low_bit
+        solvable = destroyed == all_targets
+        if is_initial_state:
+            self._solvable = solvable
+        return solvable
+    
+    def set_tile(self, loc: tuple[int, int], block: str, player_loc: Optional[tuple[int, int]] = None) -> None:
+        """
+        Changes the tile at the given location into a wall, safe or mud tile, updating the
+        maze's lookup tables in time proportional to the length of its row and column.
+        
+        Tiles holding a target or the player cannot be changed: neither the player's starting
+        tile, nor, when the player has moved on, the tile given as player_loc. Targets stay
+        unchangeable once destroyed, since they keep their bit in every targets mask.
+        
+        [!] Note: solutions, SearchResults and heuristics computed before the change may no
+        longer hold; see ReplanningPlanner for re-planning around changes.
+        
+        Parameters:
+            loc (tuple[int, int]):
+                The location of the tile to change.
+            block (str):
+                The new content of the tile: Constants.WALL_BLOCK, SAFE_BLOCK or MUD_BLOCK.
+            player_loc (Optional[tuple[int, int]]):
+                The player's current location, if it may differ from the starting one.
+        
+        Raises:
+            ValueError:
+                If loc is outside the maze or holds a target or the player, or block is not
+                one of the allowed contents.
+        """
+        cell = self.get_cell_id(loc)
+        if block not in (Constants.WALL_BLOCK, Constants.SAFE_BLOCK, Constants.MUD_BLOCK):
+            raise ValueError(f"cannot change a tile into {block!r}")
+        if cell < 0 or loc in self._targets:
+            raise ValueError(f"tile {loc} cannot be changed")
+        if loc in (self._player_loc, player_loc):
+            raise ValueError(f"tile {loc} is under the player")
+        was_open = bool(self._enter_cost[cell])
+        self._version += 1
+        self._grid[cell] = ord(block)
+        self._enter_cost[cell] = _ENTER_COSTS[ord(block)]
+        self._solvable = None
+        for neighbor in (cell, cell - self._width, cell + self._width, cell - 1, cell + 1):
+            self._move_table.pop(neighbor, None)
+        if was_open != bool(self._enter_cost[cell]):
+            (x, y) = loc
+            self._relabel_line(self._row_seg, self._row_seg_targets, self._row_seg_masks, y * self._width, 1, self._width, cell)
+            self._relabel_line(self._col_seg, self._col_seg_targets, self._col_seg_masks, x, self._width, self._height, cell)
+    
+    def _relabel_line(self, seg_ids: array, seg_targets: dict[int, frozenset[tuple[int, int]]], seg_masks: dict[int, int], first: int, step: int, length: int, changed_cell: int) -> None:
+        """
+        Gives fresh segment ids to the runs of non-wall tiles along a single row or column,
+        after a tile in it has changed, and regroups the targets in them.
+        
+        Parameters:
+            seg_ids (array):
+                The cell-indexed segment ids of either the rows or the columns of the maze.
+            seg_targets (dict[int, frozenset[tuple[int, int]]]):
+                The targets of each segment, matching seg_ids.
+            seg_masks (dict[int, int]):
+                The targets mask of each segment, matching seg_ids.
+            first (int):
+                The cell id of the first tile of the line.
+            step (int):
+                The distance between consecutive cells of the line: 1 for rows, the width for columns.
+            length (int):
+                The number of tiles in the line.
+            changed_cell (int):
+                The cell id of the tile that changed, whose old segment id is not to be trusted.
+        """
+        # Only tiles that were open before the change carry segment ids of this line; walls
+        # may carry those of the line before
+        line_cells = range(first, first + step * length, step)
+        for cell in line_cells:
+            if self._enter_cost[cell] and cell != changed_cell:
+                seg_targets.pop(seg_ids[cell], None)
+                seg_masks.pop(seg_ids[cell], None)
+        in_run = False
+        run_targets: dict[int, list[tuple[int, int]]] = {}
+        for cell in line_cells:
+            if not self._enter_cost[cell]:
+                in_run = False
+                seg_ids[cell] = -1
+                continue
+            if not in_run:
+                in_run, self._next_seg_id = True, self._next_seg_id + 1
+            seg_ids[cell] = self._next_seg_id
+            loc = self.get_cell_loc(cell)
+            if loc in self._target_bits:
+                run_targets.setdefault(self._next_seg_id, []).append(loc)
+        for (seg, targets) in run_targets.items():
+            seg_targets[seg] = frozenset(targets)
+            seg_masks[seg] = self.get_target_mask(targets)
+    
+    def get_vantage_cells(self, target: tuple[int, int]) -> list[int]:
+        """
+        Returns every cell from which the given target could be shot, i.e., the cells of the
+        wall-bounded row and column segments it sits in (including its own).
+        
+        Parameters:
+            target (tuple[int, int]):
+                The location of the target.
+        
+        Returns:
+            list[int]:
+                The cell ids of all tiles with a line of sight to target.
+        """
+        cell = self.get_cell_id(target)
+        if cell < 0 or not self._enter_cost[cell]:
+            return []
+        vantage_cells = [cell]
+        for action in Constants.MOVES:
+            (dx, dy) = Constants.MOVE_DIRS[action]
+            if not (dx or dy):
+                continue
+            loc = (target[0] + dx, target[1] + dy)
+            while (next_cell := self.get_cell_id(loc)) >= 0 and self._enter_cost[next_cell]:
+                vantage_cells.append(next_cell)
+                loc = (loc[0] + dx, loc[1] + dy)
+        return vantage_cells
+    
+    def get_transitions(self, player_loc: tuple[int, int], targets_left: AbstractSet[tuple[int, int]]) -> dict:
         """
         Returns a dictionary describing all possible transitions that a player may take from their
         given position. 
@@ -135,7 +649,7 @@ class MazeProblem:
         Parameters:
             player_loc (tuple[int, int]):
                 The current location of the player / the location from which they are shooting.
-            targets_left (set[tuple[int, int]])
+            targets_left (AbstractSet[tuple[int, int]])
                 A set of location tuples indicating the positions of remaining targets to shoot.
         
         Returns:
@@ -154,16 +668,53 @@ class MazeProblem:
                 "U": {next_loc: (3,2), cost: 1, targets_hit: {}},
             }
         """
-        new_player_locs = {action: (player_loc[0] + offset[0], player_loc[1] + offset[1]) for action, offset in Constants.MOVE_DIRS.items()}
-        transitions = {
-            action: {
-                "next_loc": loc,
-                "cost": self.get_transition_cost(action, loc),
-                "targets_hit": self.get_visible_targets_from_loc(loc, targets_left) if action == "S" else set()
-            } for action, loc in new_player_locs.items() if loc not in self._walls and loc not in targets_left
-        }
+        transitions: dict = {}
+        cell = self.get_cell_id(player_loc)
+        for (action_code, next_cell, cost, _) in self.get_moves(cell):
+            loc = self.get_cell_loc(next_cell)
+            if loc not in targets_left:
+                transitions[Constants.MOVES[action_code]] = {"next_loc": loc, "cost": cost, "targets_hit": set()}
+        if cell >= 0 and self._enter_cost[cell] and player_loc not in targets_left:
+            transitions["S"] = {
+                "next_loc": player_loc,
+                "cost": Constants.SHOOTING_COST,
+                "targets_hit": self.get_visible_targets_from_loc(player_loc, targets_left)
+            }
         return transitions
     
+    def get_moves(self, cell: int) -> tuple[tuple[int, int, int, int], ...]:
+        """
+        Lean, allocation-free counterpart of get_transitions for the movement actions: returns
+        the cached move table entry of the given cell, which depends only on the maze. Moves
+        onto a target are included, tagged with that target's bit, since they are blocked only
+        while the target remains; the shoot action is answered by get_shot_mask.
+        
+        [!] Note: the returned tuple is shared between calls and must not be modified.
+        
+        Parameters:
+            cell (int):
+                The cell id of the player's current location.
+        
+        Returns:
+            tuple[tuple[int, int, int, int], ...]:
+                One (action_code, next_cell, cost, target_bit) tuple per move onto a non-wall
+                tile, where action_code indexes Constants.MOVES and target_bit is the bit of the
+                target on next_cell, or 0 if there is none.
+        """
+        moves = self._move_table.get(cell)
+        if moves is None:
+            if cell < 0:
+                return ()
+            (x, y) = self.get_cell_loc(cell)
+            move_list = []
+            for (action_code, action) in enumerate(Constants.MOVES):
+                (dx, dy) = Constants.MOVE_DIRS[action]
+                next_cell = self.get_cell_id((x + dx, y + dy))
+                if (dx or dy) and next_cell >= 0 and self._enter_cost[next_cell]:
+                    move_list.append((action_code, next_cell, self._enter_cost[next_cell], self._target_bits.get((x + dx, y + dy), 0)))
+            moves = self._move_table[cell] = tuple(move_list)
+        return moves
+    
     def test_solution(self, solution: Optional[list[str]]) -> dict:
         """
         Given a solution (a sequence of actions), tests to ensure that the provided series of steps
@@ -186,22 +737,63 @@ class MazeProblem:
                       in the maze
                     - cost (int): the total cost of all actions taken, or -1 if is_solution is False
         """
-        remaining_targets = copy.deepcopy(self._targets)
-        player_loc = self.get_initial_loc()
-        cost = 0
-        err_result = {"is_solution": False, "cost": -1}
+        result = self.verify_solution(solution)
+        return {"is_solution": result["is_solution"], "cost": result["cost"]}
+    
+    def verify_solution(self, solution: Optional[Sequence[str]]) -> dict:
+        """
+        Fast counterpart of test_solution that also locates the first invalid step, for
+        checking plans before they are served. The plan is replayed on cell ids with the
+        precomputed cell offset of each action and a bitmask of remaining targets, updated
+        with one segment lookup per shot, stopping at the first invalid step.
         
+        Parameters:
+            solution (Optional[Sequence[str]]):
+                A sequence of actions that possibly solves the maze, e.g., ["S", "U", "S"]
+        
+        Returns:
+            dict:
+                A dictionary with 3 keys:
+                    - is_solution (bool): whether or not the solution successfully hits all targets
+                      in the maze
+                    - cost (int): the total cost of all actions taken, or -1 if some action is
+                      invalid (as with test_solution, valid plans leaving targets standing are costed)
+                    - failed_step (int): the index of the first action that is unknown or moves
+                      the player off the maze, onto a wall or onto a remaining target; the length
+                      of the solution if every action is valid but targets remain; -1 if
+                      is_solution is True
+        """
         if solution is None:
-            return err_result
-        
-        for action in solution:
-            offset = Constants.MOVE_DIRS[action]
-            player_loc = (player_loc[0] + offset[0], player_loc[1] + offset[1])
-            if player_loc in self._walls or player_loc in remaining_targets:
-                return err_result
-            targets_hit = self.get_visible_targets_from_loc(player_loc, remaining_targets) if action == "S" else set()
-            remaining_targets -= targets_hit
-            cost += self.get_transition_cost(action, player_loc)
-        
-        return {"is_solution": len(remaining_targets) == 0, "cost": cost}
+            return {"is_solution": False, "cost": -1, "failed_step": 0}
+        (width, height) = (self._width, self._height)
+        (x, y) = self._player_loc
+        cell = y * width + x
+        targets_mask = self.get_initial_target_mask()
+        enter_cost = self._enter_cost
+        target_cell_bits = self._target_cell_bits
+        (row_seg, col_seg) = (self._row_seg, self._col_seg)
+        (row_seg_masks, col_seg_masks) = (self._row_seg_masks, self._col_seg_masks)
+        cost = 0
+        
+        for (step, action) in enumerate(solution):
+            if action == "S":
+                targets_mask &= ~(row_seg_masks.get(row_seg[cell], 0) | col_seg_masks.get(col_seg[cell], 0))
+                cost += Constants.SHOOTING_COST
+                continue
+            offset = _MOVE_OFFSETS.get(action)
+            if offset is None:
+                return {"is_solution": False, "cost": -1, "failed_step": step}
+            x += offset[0]
+            y += offset[1]
+            if not (0 <= x < width and 0 <= y < height):
+                return {"is_solution": False, "cost": -1, "failed_step": step}
+            cell += offset[0] + offset[1] * width
+            step_cost = enter_cost[cell]
+            if not step_cost or target_cell_bits.get(cell, 0) & targets_mask:
+                return {"is_solution": False, "cost": -1, "failed_step": step}
+            cost += step_cost
+        
+        if targets_mask:
+            return {"is_solution": False, "cost": cost, "failed_step": len(solution)}
+        return {"is_solution": True, "cost": cost, "failed_step": -1}
     
@@ -0,0 +1,430 @@
+'''
+Parallel A* for single mazes too large to solve quickly on one core: a hash-distributed A*
+(HDA*) in which each of a number of worker processes owns the search states whose hash
+falls to it, keeps their open list and best costs, and expands them; children owned by
+another worker are sent to it in batches. The maze and the distance tables of the workers'
+VantageHeuristics are computed once, by the coordinating process, and shared with the
+workers through shared memory blocks rather than rebuilt or pickled in each of them.
+
+Workers keep expanding as long as they hold a node whose f(n) is below the cost of the
+best plan found by any of them (the incumbent). The search ends when every worker is idle
+and every batch sent has been received, checked by the coordinating process from the
+workers' counters; with an admissible heuristic, the incumbent is then optimal. The plan
+is finally traced back from the goal by asking each state's owner for its parent.
+'''
+from maze_problem import MazeProblem
+from constants import Constants
+from heuristics import VantageDistances, VantageHeuristic, UNREACHABLE
+from pathfinder import SearchBudget, SearchResult, SearchState, SearchStatus, get_successors
+from multiprocessing.shared_memory import SharedMemory
+from typing import *
+import heapq
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import time
+
+logger = logging.getLogger(__name__)
+
+# How far above the lowest f(n) of all workers a worker may expand
+_F_SLACK: int = 2
+
+# A child state sent to its owner: (cell, targets_mask, g, parent_cell, parent_mask, action_code)
+_Message = tuple[int, int, int, int, int, int]
+
+class _SharedSearch(NamedTuple):
+    """
+    The shared state of a parallel search, handed to every worker process on start.
+
+    Attributes:
+        workers (int):
+            The number of worker processes.
+        grid_name (str):
+            The name of the shared memory block holding the maze's tiles, row after row.
+        tables_name (str):
+            The name of the shared memory block holding the maze's VantageDistances, laid out
+            by VantageDistances.to_bytes.
+        width (int):
+            The width of the maze.
+        height (int):
+            The height of the maze.
+        inboxes (list):
+            One queue per worker, receiving batches of states and, once the search is over,
+            the coordinator's queries.
+        replies (Any):
+            The queue on which workers answer the coordinator's queries.
+        sent (Any):
+            The number of batches sent by each worker, and by the coordinator in the last slot.
+        received (Any):
+            The number of batches received by each worker.
+        idle (Any):
+            Whether each worker has run out of nodes worth expanding.
+        expanded (Any):
+            The number of nodes expanded by each worker.
+        stored (Any):
+            The number of states stored by each worker.
+        lowest_f (Any):
+            The lowest f(n) on each worker's open list, as of its last batch.
+        incumbent (Any):
+            The cost of the best plan found so far, or UNREACHABLE.
+        stop (Any):
+            The event telling the workers to stop searching and answer queries.
+    """
+    workers: int
+    grid_name: str
+    tables_name: str
+    width: int
+    height: int
+    inboxes: list
+    replies: Any
+    sent: Any
+    received: Any
+    idle: Any
+    expanded: Any
+    stored: Any
+    lowest_f: Any
+    incumbent: Any
+    stop: Any
+
+def _owner(cell: int, targets_mask: int, workers: int) -> int:
+    """
+    Returns the index of the worker owning the given state; tuples of ints hash the same in
+    every process.
+    """
+    return hash((cell, targets_mask)) % workers
+
+def solve_parallel(problem: MazeProblem, workers: Optional[int] = None, budget: Optional[SearchBudget] = None,
+                   batch_size: int = 64) -> SearchResult:
+    """
+    Parallel counterpart of pathfinder.solve, searching the given problem from its initial
+    state with HDA* over worker processes guided by VantageHeuristics, whose distance tables
+    are computed once and shared by all workers. Worth it only for large mazes, as starting
+    the workers and exchanging states between them has a fixed cost.
+
+    Parameters:
+        problem (MazeProblem):
+            The maze to solve.
+        workers (Optional[int]):
+            The number of worker processes, defaulting to the number of CPUs.
+        budget (Optional[SearchBudget]):
+            If given, the resource limits of the search, counted over all workers together.
+        batch_size (int):
+            The number of nodes a worker expands between two sends of the children it
+            generated for other workers.
+
+    Returns:
+        SearchResult:
+            The status of the search, its solution if any, and the effort spent on it; the
+            partial plan is the best plan found, if any, when the budget runs out.
+
+    Raises:
+        ValueError:
+            If workers or batch_size is less than 1.
+        RuntimeError:
+            If a worker process dies.
+    """
+    workers = workers if workers is not None else os.cpu_count() or 1
+    if workers < 1 or batch_size < 1:
+        raise ValueError("workers and batch_size must be at least 1")
+    if not problem.is_solvable():
+        return SearchResult(SearchStatus.UNSOLVABLE, None, -1, 0, [])
+    budget = budget if budget is not None else SearchBudget()
+    grid = problem.get_grid()
+    (width, height) = problem.get_dimensions()
+    tables = VantageDistances(problem).to_bytes()
+    context = multiprocessing.get_context()
+    shared_grid = SharedMemory(create=True, size=max(1, len(grid)))
+    shared_tables = SharedMemory(create=True, size=len(tables))
+    processes: list[Any] = []
+    try:
+        assert shared_grid.buf is not None and shared_tables.buf is not None
+        shared_grid.buf[:len(grid)] = grid
+        shared_tables.buf[:len(tables)] = tables
+        del tables
+        shared = _SharedSearch(
+            workers, shared_grid.name, shared_tables.name, width, height,
+            [context.Queue() for _ in range(workers)], context.Queue(),
+            context.Array("q", workers + 1, lock=False), context.Array("q", workers, lock=False),
+            context.Array("b", workers, lock=False), context.Array("q", workers, lock=False),
+            context.Array("q", workers, lock=False), context.Array("q", [UNREACHABLE] * workers, lock=False),
+            context.Value("q", UNREACHABLE), context.Event(),
+        )
+        processes = [context.Process(target=_work, args=(shared, index, batch_size), daemon=True) for index in range(workers)]
+        for process in processes:
+            process.start()
+        root = SearchState(problem.get_cell_id(problem.get_initial_loc()), problem.get_initial_target_mask())
+        shared.sent[workers] += 1
+        shared.inboxes[_owner(root.cell, root.targets_mask, workers)].put([(root.cell, root.targets_mask, 0, -1, -1, -1)])
+        give_up_reason = _await_termination(shared, processes, budget)
+        shared.stop.set()
+        for inbox in shared.inboxes:
+            inbox.put(("goal",))
+        goals = [_await_reply(shared.replies, processes) for _ in range(workers)]
+        (cost, goal_cell, goal_mask) = min(goals)
+        plan = _trace_plan(shared, processes, goal_cell, goal_mask) if cost < UNREACHABLE else None
+        expansions = sum(shared.expanded)
+        for inbox in shared.inboxes:
+            inbox.put(("exit",))
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for block in (shared_grid, shared_tables):
+            block.close()
+            block.unlink()
+    if give_up_reason is not None:
+        logger.warning("parallel pathfind gave up after %d expansions: %s", expansions, give_up_reason)
+        return SearchResult(SearchStatus.BUDGET_EXHAUSTED, None, -1, expansions, plan or [])
+    if plan is None:
+        return SearchResult(SearchStatus.UNSOLVABLE, None, -1, expansions, [])
+    return SearchResult(SearchStatus.SOLVED, plan, cost, expansions, plan)
+
+def pathfind_parallel(problem: MazeProblem, workers: Optional[int] = None, budget: Optional[SearchBudget] = None) -> Optional[list[str]]:
+    """
+    Parallel counterpart of pathfinder.pathfind; see solve_parallel.
+
+    Returns:
+        Optional[list[str]]:
+            A solution to the problem, or None if there is none (or the budget ran out).
+    """
+    return solve_parallel(problem, workers, budget).solution
+
+def _await_termination(shared: _SharedSearch, processes: list[Any], budget: SearchBudget) -> Optional[str]:
+    """
+    Polls the workers' counters until the search is over: every worker idle and every batch
+    sent received, in two successive readings that show no activity in between (a worker
+    only turns busy again on receiving a batch, which the second reading would notice).
+
+    Parameters:
+        shared (_SharedSearch):
+            The shared state of the search.
+        processes (list[Any]):
+            The worker processes.
+        budget (SearchBudget):
+            The resource limits of the search.
+
+    Returns:
+        Optional[str]:
+            None if the search ran to completion, or else the budget limit that was reached.
+
+    Raises:
+        RuntimeError:
+            If a worker process dies.
+    """
+    (deadline, max_expansions, max_nodes) = budget.get_limits(time.monotonic())
+    while True:
+        time.sleep(0.001)
+        counters = (sum(shared.sent), sum(shared.received))
+        if all(shared.idle) and counters[0] == counters[1] and counters == (sum(shared.sent), sum(shared.received)):
+            return None
+        if time.monotonic() > deadline:
+            return "time limit reached"
+        if sum(shared.expanded) >= max_expansions:
+            return "expansion limit reached"
+        if sum(shared.stored) >= max_nodes:
+            return "node limit reached"
+        if not all(process.is_alive() for process in processes):
+            raise RuntimeError("a parallel search worker died")
+
+def _await_reply(replies: Any, processes: list[Any]) -> Any:
+    """
+    Waits for a worker's answer to one of the coordinator's queries, checking meanwhile that
+    no worker has died, which would leave the query unanswered.
+
+    Parameters:
+        replies (Any):
+            The queue on which workers answer queries.
+        processes (list[Any]):
+            The worker processes.
+
+    Returns:
+        Any:
+            The answer received.
+
+    Raises:
+        RuntimeError:
+            If a worker process dies.
+    """
+    while True:
+        try:
+            return replies.get(timeout=0.1)
+        except queue.Empty:
+            if not all(process.is_alive() for process in processes):
+                raise RuntimeError("a parallel search worker died")
+
+def _trace_plan(shared: _SharedSearch, processes: list[Any], cell: int, targets_mask: int) -> list[str]:
+    """
+    Follows the parents of the given goal state back to the root, asking each state's owner
+    for its parent.
+
+    Parameters:
+        shared (_SharedSearch):
+            The shared state of the search, whose workers are answering queries.
+        processes (list[Any]):
+            The worker processes.
+        cell (int):
+            The goal's cell.
+        targets_mask (int):
+            The goal's targets mask.
+
+    Returns:
+        list[str]:
+            The actions leading from the root to the goal.
+
+    Raises:
+        RuntimeError:
+            If a worker process dies.
+    """
+    path: list[str] = []
+    while True:
+        shared.inboxes[_owner(cell, targets_mask, shared.workers)].put(("parent", cell, targets_mask))
+        (cell, targets_mask, action_code) = _await_reply(shared.replies, processes)
+        if action_code < 0:
+            break
+        path.append(Constants.MOVES[action_code])
+    path.reverse()
+    return path
+
+def _work(shared: _SharedSearch, index: int, batch_size: int) -> None:
+    """
+    The body of a worker process: rebuilds the maze from the shared grid and its heuristic
+    on the shared distance tables, then runs _search.
+
+    Parameters:
+        shared (_SharedSearch):
+            The shared state of the search.
+        index (int):
+            The index of this worker.
+        batch_size (int):
+            The number of nodes expanded between two sends to other workers.
+    """
+    grid = SharedMemory(name=shared.grid_name)
+    try:
+        assert grid.buf is not None
+        problem = MazeProblem([bytes(grid.buf[y * shared.width:(y + 1) * shared.width]) for y in range(shared.height)])
+    finally:
+        grid.close()
+    tables = SharedMemory(name=shared.tables_name)
+    try:
+        assert tables.buf is not None
+        distances = VantageDistances.from_buffer(problem, tables.buf)
+        if distances is None:
+            raise RuntimeError("the shared distance tables do not match the maze")
+        _search(shared, index, batch_size, problem, VantageHeuristic(problem, distances))
+    finally:
+        # The tables are views of the block, which cannot be closed while they are alive
+        distances = None
+        tables.close()
+
+def _search(shared: _SharedSearch, index: int, batch_size: int, problem: MazeProblem, heuristic: VantageHeuristic) -> None:
+    """
+    Searches a worker's share of the state space until the search is stopped, then answers
+    the coordinator's queries until told to exit.
+
+    Parameters:
+        shared (_SharedSearch):
+            The shared state of the search.
+        index (int):
+            The index of this worker.
+        batch_size (int):
+            The number of nodes expanded between two sends to other workers.
+        problem (MazeProblem):
+            The maze searched.
+        heuristic (VantageHeuristic):
+            The heuristic guiding the search, built on the shared distance tables.
+    """
+    workers, inbox = shared.workers, shared.inboxes[index]
+    best_g: dict[SearchState, int] = {}
+    parents: dict[SearchState, tuple[int, int, int]] = {}
+    open_list: list[tuple[int, int, int, int, SearchState]] = []
+    counter = itertools.count()
+    outboxes: list[list[_Message]] = [[] for _ in range(workers)]
+    (goal_cost, goal) = (UNREACHABLE, SearchState(-1, -1))
+
+    def receive(messages: list[_Message]) -> None:
+        # States are only (re)opened if they improve on the best known cost of their state
+        for (cell, targets_mask, g, parent_cell, parent_mask, action_code) in messages:
+            state = SearchState(cell, targets_mask)
+            if g >= best_g.get(state, UNREACHABLE):
+                continue
+            h: int = heuristic(cell, targets_mask)
+            if h >= UNREACHABLE:
+                continue
+            best_g[state] = g
+            parents[state] = (parent_cell, parent_mask, action_code)
+            heapq.heappush(open_list, (g + h, h, next(counter), g, state))
+
+    while not shared.stop.is_set():
+        try:
+            while isinstance(messages := inbox.get_nowait(), list):
+                shared.idle[index] = False
+                shared.received[index] += 1
+                receive(messages)
+            # The search is over and the coordinator has started asking questions
+            inbox.put(messages)
+            continue
+        except queue.Empty:
+            pass
+        incumbent = shared.incumbent.value
+        # Without a global frontier, a worker racing ahead of the others would expand nodes a
+        # serial search never would; workers stay within _F_SLACK of the lowest f(n) of all
+        shared.lowest_f[index] = open_list[0][0] if open_list else UNREACHABLE
+        f_limit = min(shared.lowest_f) + _F_SLACK
+        expansions = 0
+        while open_list and expansions < batch_size:
+            (f, _, _, g, state) = open_list[0]
+            if f >= incumbent or f > f_limit:
+                break
+            heapq.heappop(open_list)
+            if g != best_g[state]:
+                continue
+            if not state.targets_mask:
+                if g < goal_cost:
+                    (goal_cost, goal) = (g, state)
+                    with shared.incumbent.get_lock():
+                        if g < shared.incumbent.value:
+                            shared.incumbent.value = g
+                    incumbent = shared.incumbent.value
+                continue
+            expansions += 1
+            for (action_code, next_cell, cost, child_mask) in get_successors(problem.get_moves, problem.get_shot_mask, state.cell, state.targets_mask):
+                outboxes[_owner(next_cell, child_mask, workers)].append((next_cell, child_mask, g + cost, state.cell, state.targets_mask, action_code))
+            # Children owned by this worker are opened at once, keeping its expansions best-first
+            receive(outboxes[index])
+            outboxes[index] = []
+        shared.expanded[index] += expansions
+        shared.stored[index] = len(best_g)
+        for (owner, outbox) in enumerate(outboxes):
+            if outbox:
+                # Counted before sending, so that a batch in flight is always seen as such
+                shared.sent[index] += 1
+                shared.inboxes[owner].put(outbox)
+                outboxes[owner] = []
+        shared.lowest_f[index] = open_list[0][0] if open_list else UNREACHABLE
+        if not expansions:
+            # Waiting either for work, or for the other workers to catch up
+            waiting = bool(open_list) and open_list[0][0] < shared.incumbent.value
+            shared.idle[index] = not waiting
+            try:
+                messages = inbox.get(timeout=0.001 if waiting else 0.01)
+            except queue.Empty:
+                continue
+            if not isinstance(messages, list):
+                inbox.put(messages)
+                continue
+            shared.idle[index] = False
+            shared.received[index] += 1
+            receive(messages)
+
+    while True:
+        query = inbox.get()
+        if query[0] == "goal":
+            shared.replies.put((goal_cost, goal.cell, goal.targets_mask))
+        elif query[0] == "parent":
+            shared.replies.put(parents[SearchState(query[1], query[2])])
+        elif query[0] == "exit":
+            return
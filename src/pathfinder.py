@@ -5,14 +5,44 @@ Author: <ISAIAH PAJARILLO>
 Modify only this file as part of your submission, as it will contain all of the logic
 necessary for implementing the A* pathfinder that solves the target practice problem.
 '''
-from queue import PriorityQueue
 from maze_problem import MazeProblem
-from dataclasses import *
+from constants import Constants
+from heuristics import Heuristic, VantageDistances, VantageHeuristic, UNREACHABLE
 from typing import *
+from enum import Enum
+from array import array
+import heapq
 import itertools
+import math
+import time
 
-@dataclass
-class SearchTreeNode:
+if TYPE_CHECKING:
+    from corridor_graph import CorridorGraph
+
+def _log_warning(message: str, *args: Any) -> None:
+    """
+    Logs a warning through this module's logger. The logging package is only imported here,
+    on first use, as it is slow to import and a search that stays within budget never warns.
+    """
+    import logging
+    logging.getLogger(__name__).warning(message, *args)
+
+class SearchState(NamedTuple):
+    """
+    Compact, hashable description of a state in the search space, used as the key of the
+    closed set so that states reached along different paths are detected as duplicates.
+
+    Attributes:
+        cell (int):
+            The player's location packed into a flat cell id (see MazeProblem.get_cell_id).
+        targets_mask (int):
+            The remaining targets as a bitmask indexed by target ordinal (see
+            MazeProblem.get_target_order).
+    """
+    cell: int
+    targets_mask: int
+
+class SearchTreeNode(NamedTuple):
     """
     SearchTreeNodes contain the following attributes to be used in generation of
     the Search tree:
@@ -24,15 +54,431 @@ class SearchTreeNode:
             The action taken to reach this node from its parent (or empty if the root).
         parent (Optional[SearchTreeNode]):
             The parent node from which this node was generated (or None if the root).
+        state (SearchState):
+            The compact search state (location and remaining targets) of this node.
+        cost (int):
+            The total cost of the path from the root to this node, g(n).
     """
     player_loc: tuple[int, int]
     action: str
     parent: Optional["SearchTreeNode"]
+    state: SearchState
+    cost: int
+    
+class NodePoolFullError(Exception):
+    """
+    Raised by NodePool.add when the pool already holds as many nodes as its capacity allows.
+    """
 
+class NodePool:
+    """
+    Struct-of-arrays store for the nodes of a search tree: a node is an int index into
+    parallel array buffers holding its cell, action code, parent index and path cost, plus
+    a list of remaining-targets masks (masks may outgrow a machine int). Measured with
+    tracemalloc, a pooled node costs about 55 bytes (17 of buffers, the rest its mask), where
+    a SearchTreeNode with its location tuple and SearchState costs about 330 bytes, or 290
+    bytes with slots.
 
-    # TODO: Add any other attributes and method overrides as necessary!
+    Attributes:
+        capacity (Optional[int]):
+            The maximum number of nodes the pool may hold, or None if unbounded.
+    """
+    ROOT: int = -1
+    
+    def __init__(self, capacity: Optional[int] = None, actions: Sequence[str] = Constants.MOVES) -> None:
+        """
+        Constructs an empty pool.
+        
+        Parameters:
+            capacity (Optional[int]):
+                The maximum number of nodes the pool may hold, or None if unbounded.
+            actions (Sequence[str]):
+                The table that action codes index, Constants.MOVES by default; an entry may
+                stand for several steps, such as a compressed corridor of a CorridorGraph.
+        """
+        self.capacity: Optional[int] = capacity
+        self._action_table: Sequence[str] = actions
+        self._cells: array = array("i")
+        # Other action tables, such as a CorridorGraph's, keep growing past what a byte holds
+        self._actions: array = array("b" if actions is Constants.MOVES else "i")
+        self._parents: array[int] = array("i")
+        self._costs: array[int] = array("i")
+        self._masks: list[int] = []
+        
+    def __len__(self) -> int:
+        return len(self._cells)
+    
+    def add(self, state: SearchState, action: int, parent: int, cost: int) -> int:
+        """
+        Stores a new node and returns its index.
+        
+        Parameters:
+            state (SearchState):
+                The search state of the new node.
+            action (int):
+                The index in the pool's action table of the action taken to reach the node, or
+                -1 for the root.
+            parent (int):
+                The index of the node's parent, or NodePool.ROOT for the root.
+            cost (int):
+                The total cost of the path from the root to the node, g(n).
+        
+        Returns:
+            int:
+                The index of the new node.
+        
+        Raises:
+            NodePoolFullError:
+                If the pool already holds capacity nodes.
+        """
+        index = len(self._cells)
+        if self.capacity is not None and index >= self.capacity:
+            raise NodePoolFullError(f"node pool capacity of {self.capacity} reached")
+        self._cells.append(state.cell)
+        self._actions.append(action)
+        self._parents.append(parent)
+        self._costs.append(cost)
+        self._masks.append(state.targets_mask)
+        return index
+    
+    def get_state(self, index: int) -> SearchState:
+        """
+        Returns the search state of the node at the given index.
+        """
+        return SearchState(self._cells[index], self._masks[index])
+    
+    def get_cost(self, index: int) -> int:
+        """
+        Returns the path cost g(n) of the node at the given index.
+        """
+        return self._costs[index]
+    
+    def get_parent(self, index: int) -> int:
+        """
+        Returns the index of the parent of the node at the given index, or NodePool.ROOT.
+        """
+        return self._parents[index]
     
-def pathfind(problem: "MazeProblem") -> Optional[list[str]]:
+    def get_action(self, index: int) -> str:
+        """
+        Returns the action taken to reach the node at the given index (empty for the root),
+        which may be several steps long if the pool's action table compresses them.
+        """
+        code = self._actions[index]
+        return self._action_table[code] if code >= 0 else ""
+    
+    def get_node(self, index: int, problem: MazeProblem) -> SearchTreeNode:
+        """
+        Materializes the node at the given index, along with its chain of ancestors, as
+        SearchTreeNode objects, e.g., for inspection or debugging.
+        
+        Parameters:
+            index (int):
+                The index of the node to materialize.
+            problem (MazeProblem):
+                The problem whose cell ids the pool's nodes refer to.
+        
+        Returns:
+            SearchTreeNode:
+                The node at the given index, linked to its materialized parents.
+        """
+        chain: list[int] = []
+        while index != NodePool.ROOT:
+            chain.append(index)
+            index = self._parents[index]
+        node: Optional[SearchTreeNode] = None
+        for i in reversed(chain):
+            node = SearchTreeNode(problem.get_cell_loc(self._cells[i]), self.get_action(i), node, self.get_state(i), self._costs[i])
+        assert node is not None
+        return node
+    
+class Frontier:
+    """
+    Single-threaded priority queue of search tree nodes built on heapq, ordered by f(n) and
+    then by h(n), so that among equally promising nodes the one closest to a goal is expanded
+    first, and then by insertion order. Each search state has at most one live entry:
+    pushing a state that is already queued replaces (decrease-key) its old entry, which is
+    lazily discarded when it reaches the top of the heap.
+    """
+    _REMOVED: int = -1
+    
+    def __init__(self) -> None:
+        """
+        Constructs an empty frontier.
+        """
+        self._heap: list[list[Any]] = []
+        self._entries: dict[SearchState, list[Any]] = {}
+        self._counter = itertools.count()
+        
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def push(self, state: SearchState, node: int, f: int, h: int) -> None:
+        """
+        Queues the given node, replacing any entry already queued for the same state.
+        
+        Parameters:
+            state (SearchState):
+                The search state of the node.
+            node (int):
+                The node's index in its NodePool.
+            f (int):
+                The node's priority, g(n) + h(n).
+            h (int):
+                The node's heuristic estimate, used to break ties between equal f values.
+        """
+        old_entry = self._entries.get(state)
+        if old_entry is not None:
+            old_entry[-1] = Frontier._REMOVED
+        entry = [f, h, next(self._counter), state, node]
+        self._entries[state] = entry
+        heapq.heappush(self._heap, entry)
+        
+    def peek_priority(self) -> Optional[int]:
+        """
+        Returns the f(n) priority of the node pop would return, without removing it.
+        
+        Returns:
+            Optional[int]:
+                The lowest f(n) queued, or None if the frontier is empty.
+        """
+        heap = self._heap
+        while heap and heap[0][-1] == Frontier._REMOVED:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+        
+    def pop(self) -> int:
+        """
+        Removes and returns the queued node with the lowest (f, h) priority.
+        
+        Returns:
+            int:
+                The index of the popped node in its NodePool.
+        
+        Raises:
+            IndexError:
+                If the frontier is empty.
+        """
+        node: int
+        while self._heap:
+            _, _, _, state, node = heapq.heappop(self._heap)
+            if node != Frontier._REMOVED:
+                del self._entries[state]
+                return node
+        raise IndexError("pop from an empty Frontier")
+    
+class SearchStats:
+    """
+    Counters and timers filled in by a search when passed one through its stats argument.
+    Leaving it out disables all timing, so that an uninstrumented search pays nothing for it.
+    All of them start at zero.
+
+    Attributes:
+        nodes_generated (int):
+            The number of search tree nodes created, including the root.
+        nodes_expanded (int):
+            The number of nodes whose children were generated.
+        peak_frontier (int):
+            The largest number of nodes queued on the frontier at once.
+        duplicates (int):
+            Children dropped because their state had already been reached at no greater cost.
+        reopened (int):
+            Children that improved on the best known cost of an already reached state,
+            replacing its queued entry or reopening it if it had been expanded.
+        transitions_time (float):
+            Seconds spent fetching moves from the maze's transition table.
+        visibility_time (float):
+            Seconds spent finding which targets a shot would hit.
+        heuristic_time (float):
+            Seconds spent evaluating the heuristic.
+    """
+    __slots__ = ("nodes_generated", "nodes_expanded", "peak_frontier", "duplicates", "reopened",
+                 "transitions_time", "visibility_time", "heuristic_time")
+
+    def __init__(self) -> None:
+        self.nodes_generated: int = 0
+        self.nodes_expanded: int = 0
+        self.peak_frontier: int = 0
+        self.duplicates: int = 0
+        self.reopened: int = 0
+        self.transitions_time: float = 0.0
+        self.visibility_time: float = 0.0
+        self.heuristic_time: float = 0.0
+
+    def __repr__(self) -> str:
+        return f"SearchStats({', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)})"
+
+class SearchHooks(NamedTuple):
+    """
+    Optional callbacks invoked by a search when passed one through its hooks argument.
+
+    Attributes:
+        on_expand (Optional[Callable[[SearchState, int], None]]):
+            Called with the state and path cost g(n) of every node about to be expanded.
+        on_goal (Optional[Callable[[list[str], int], None]]):
+            Called with the solution and its cost when a goal state is reached.
+    """
+    on_expand: Optional[Callable[[SearchState, int], None]] = None
+    on_goal: Optional[Callable[[list[str], int], None]] = None
+
+T = TypeVar("T")
+
+def _timed(func: Callable[..., T], stats: SearchStats, timer: str) -> Callable[..., T]:
+    """
+    Wraps func so that the time spent in each call is added to the given timer of stats.
+
+    Parameters:
+        func (Callable[..., T]):
+            The function to time.
+        stats (SearchStats):
+            The stats object receiving the timings.
+        timer (str):
+            The name of the SearchStats timer attribute to add to.
+
+    Returns:
+        Callable[..., T]:
+            A function behaving like func.
+    """
+    def timed(*args: Any) -> T:
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            setattr(stats, timer, getattr(stats, timer) + time.perf_counter() - start)
+    return timed
+
+class SearchStatus(Enum):
+    """
+    How a search ended.
+    """
+    SOLVED = "solved"
+    UNSOLVABLE = "unsolvable"
+    BUDGET_EXHAUSTED = "budget_exhausted"
+    CANCELLED = "cancelled"
+
+class SearchBudget(NamedTuple):
+    """
+    Resource limits of a single search; a search reaching any of them gives up with a
+    SearchStatus.BUDGET_EXHAUSTED result rather than claiming the problem is unsolvable.
+
+    Attributes:
+        max_expansions (Optional[int]):
+            The most nodes the search may expand.
+        max_nodes (Optional[int]):
+            The most search tree nodes the search may generate (the capacity of its NodePool).
+        time_limit (Optional[float]):
+            The most wall-clock seconds the search may run for.
+        max_memory (Optional[int]):
+            Approximate ceiling, in bytes, on the memory held by the search tree, closed set
+            and frontier, estimated at BYTES_PER_NODE per generated node.
+    """
+    max_expansions: Optional[int] = None
+    max_nodes: Optional[int] = None
+    time_limit: Optional[float] = None
+    max_memory: Optional[int] = None
+
+    def get_limits(self, start_time: float) -> tuple[float, float, float]:
+        """
+        Turns the budget into the limits a search loop checks, math.inf standing for none.
+
+        Parameters:
+            start_time (float):
+                The time.monotonic() reading at which the search started.
+
+        Returns:
+            tuple[float, float, float]:
+                The time.monotonic() deadline, the most nodes to expand, and the most nodes to
+                generate: the lower of max_nodes and the nodes that fit in max_memory.
+        """
+        deadline = start_time + self.time_limit if self.time_limit is not None else math.inf
+        max_expansions = self.max_expansions if self.max_expansions is not None else math.inf
+        max_nodes = min(
+            self.max_nodes if self.max_nodes is not None else math.inf,
+            self.max_memory // BYTES_PER_NODE if self.max_memory is not None else math.inf,
+        )
+        return (deadline, max_expansions, max_nodes)
+
+# The memory held per generated node that SearchBudget.max_memory is counted in, measured with
+# tracemalloc over whole searches and rounded up for larger target masks
+BYTES_PER_NODE: int = 200
+
+class SearchResult(NamedTuple):
+    """
+    Outcome of a single search, as returned by solve.
+
+    Attributes:
+        status (SearchStatus):
+            Whether the problem was solved, proven unsolvable, or the search ran out of budget.
+        solution (Optional[list[str]]):
+            The optimal sequence of actions found, or None unless status is SOLVED.
+        cost (int):
+            The total cost of solution, or -1 if there is none.
+        expansions (int):
+            The number of nodes expanded by the search.
+        partial_plan (list[str]):
+            The path to the first expanded state with the fewest targets left: the whole
+            solution if solved, and the most progress made otherwise.
+    """
+    status: SearchStatus
+    solution: Optional[list[str]]
+    cost: int
+    expansions: int
+    partial_plan: list[str]
+
+class SearchProgress(NamedTuple):
+    """
+    Snapshot of a running search, as reported between batches by solve_iter and solve_async.
+
+    Attributes:
+        expansions (int):
+            The number of nodes expanded so far.
+        nodes_generated (int):
+            The number of search tree nodes created so far.
+        frontier_size (int):
+            The number of nodes queued on the frontier.
+        best_f (int):
+            The lowest f(n) on the frontier: with an admissible heuristic, a lower bound on the
+            cost of any solution not yet found.
+        elapsed (float):
+            Seconds since the search started.
+    """
+    expansions: int
+    nodes_generated: int
+    frontier_size: int
+    best_f: int
+    elapsed: float
+
+_SHOOT_CODE: int = Constants.MOVES.index("S")
+
+def get_successors(get_moves: Callable[[int], Sequence[tuple[int, int, int, int]]], get_shot_mask: Callable[[int, int], int],
+                   cell: int, targets_mask: int) -> list[tuple[int, int, int, int]]:
+    """
+    Generates the children of a search state: its moves, dropping those onto remaining
+    targets, and a shot if it hits anything (shooting is only worthwhile if it does).
+
+    Parameters:
+        get_moves (Callable[[int], Sequence[tuple[int, int, int, int]]]):
+            The move table lookup of the graph searched, MazeProblem.get_moves or a
+            CorridorGraph's, returning (action_code, next_cell, cost, target_bit) tuples.
+        get_shot_mask (Callable[[int, int], int]):
+            MazeProblem.get_shot_mask, or a stand-in for it.
+        cell (int):
+            The state's cell id.
+        targets_mask (int):
+            The state's remaining targets mask.
+
+    Returns:
+        list[tuple[int, int, int, int]]:
+            One (action_code, next_cell, cost, child_mask) tuple per child.
+    """
+    children = [(action_code, next_cell, cost, targets_mask) for (action_code, next_cell, cost, target_bit) in get_moves(cell) if not target_bit & targets_mask]
+    targets_hit: int = get_shot_mask(cell, targets_mask)
+    if targets_hit:
+        children.append((_SHOOT_CODE, cell, Constants.SHOOTING_COST, targets_mask & ~targets_hit))
+    return children
+
+def pathfind(problem: "MazeProblem", heuristic: Optional[Heuristic] = None, budget: Optional[SearchBudget] = None,
+             stats: Optional[SearchStats] = None, hooks: Optional[SearchHooks] = None) -> Optional[list[str]]:
     """
     The main workhorse method of the package that performs A* graph search to find the optimal
     sequence of actions that takes the agent from its initial state and shoots all targets in
@@ -42,6 +488,17 @@ def pathfind(problem: "MazeProblem") -> Optional[list[str]]:
         problem (MazeProblem):
             The MazeProblem object constructed on the maze that is to be solved or determined
             unsolvable by this method.
+        heuristic (Optional[Heuristic]):
+            The admissible heuristic guiding the search (see the heuristics module); defaults
+            to a VantageHeuristic built on problem.
+        budget (Optional[SearchBudget]):
+            If given, the resource limits of the search; running out of budget is logged as a
+            warning and ends the search without a solution (use solve to tell it apart from
+            the problem being unsolvable).
+        stats (Optional[SearchStats]):
+            If given, filled in with counters and timings of the search.
+        hooks (Optional[SearchHooks]):
+            If given, the callbacks to invoke as the search progresses.
 
     Returns:
         Optional[list[str]]:
@@ -49,139 +506,575 @@ def pathfind(problem: "MazeProblem") -> Optional[list[str]]:
             initial state to the goal (a maze with all targets destroyed). If no such solution is
             possible, returns None.
     """
-    # TODO: Implement A* Graph Search for the Pathfinding Biathlon!
+    return solve(problem, heuristic, budget, stats, hooks).solution
 
-    targets: set[tuple[int, int]] = problem.get_initial_targets()
-    initial_loc: tuple[int, int] = problem.get_initial_loc()
-    goal_point: tuple[int, int] = get_best_goal_point(problem, targets, initial_loc)
-    counter = itertools.count()
-    frontier: PriorityQueue[tuple[int, int ,SearchTreeNode]] = PriorityQueue()
-    frontier.put((get_heuristic(goal_point,initial_loc),next(counter), SearchTreeNode(initial_loc, "", None)))
-    iter: int = 0
+def solve(problem: "MazeProblem", heuristic: Optional[Heuristic] = None, budget: Optional[SearchBudget] = None,
+          stats: Optional[SearchStats] = None, hooks: Optional[SearchHooks] = None, start: Optional[SearchState] = None,
+          graph: Optional["CorridorGraph"] = None) -> SearchResult:
+    """
+    Performs the A* graph search behind pathfind, reporting how it ended along with its
+    solution. See pathfind for a description of the other parameters.
 
-    #case for if target is unreachable
-    for target in targets:
-        test_case: dict = problem.get_transitions(target,targets)
-        if not test_case:
-            return None
+    Parameters:
+        start (Optional[SearchState]):
+            The state to search from, defaulting to the problem's initial state; used to
+            re-plan mid-game, once the player has moved or some targets are destroyed.
+        graph (Optional[CorridorGraph]):
+            If given, a compressed movement graph of problem to search instead of its grid,
+            whose corridors are traversed in a single expansion (see corridor_graph; open
+            rooms are searched tile by tile as before); the solution is unfolded back into
+            single steps.
 
-    while not frontier.empty():
-    #case for if target is unreachable
-        iter += 1
-        if iter == 10:
-            return None
-    # Fetch the node with the highest priority from the frontier and retrieve possible moves from the current location.
-    # For each move, determine the subsequent state and update targets if a shot is taken.
-    # updates goal states once a shot is taken
-    # Adjust child priorities if they are equal and then insert the child nodes back into the frontier.
-
-        _ , w, expanding_node = frontier.get()
-        location: tuple[int, int] = expanding_node.player_loc
-        moves: dict = problem.get_transitions(location, targets)
-
-        children: list[tuple[int, SearchTreeNode]] = []
-        for key in moves:
-            if key == "S" and location == goal_point and targets:
-               targets = targets - problem.get_visible_targets_from_loc(location,targets)
-               if not targets:
-                   return _create_goal_path("S", expanding_node)
-               else:
-                    children.append((-1,(SearchTreeNode(location,"S",expanding_node)))) #?????
-                    goal_point = get_best_goal_point(problem, targets, location)
-            else:
-                children.append((get_heuristic(goal_point,moves[key]["next_loc"]) + moves[key]["cost"],SearchTreeNode(moves[key]["next_loc"], key, expanding_node)))
-        for i in range(len(children)):
-            for j in range(i+1, len(children)):
-                if children[i][0] == children[j][0]:
-                    updated_value = children[j][0] + 1
-                    children[j] = (updated_value, children[j][1])
-        for integer, node in children:
-                count = next(counter)
-                frontier.put((integer, count, node))
-    return None
-
-# >> [SC] Don't forget to add parameters and returns to your docstrings!
-def get_heuristic(goal_point: tuple[int, int], player_loc: tuple[int, int]) -> int:
-    """
-    takes in goal point and player location
-    returns the manhattan distance 
-    """
-    x, y = player_loc
-    x_goal, y_goal = goal_point
-    return abs(x_goal - x) + abs(y_goal - y)
-
-# >> [SC] Okay, there is a lot of logic here for determining the best goal post. In the case
-# of A* search, the calculation of the minimum heuristic is responsible for determining which action would
-# be best to take. Using a priority queue, the children nodes will be sorted based on the lowest
-# total cost (i.e. heuristic + path cost)
-def get_best_goal_point(problem: "MazeProblem", targets: set[tuple[int,int]], initial_loc: tuple[int,int]) -> tuple[int,int]:
-    """
-    takes in targets, problem, and initial location
-    find best vantage spot in which the most targets can be hit
-    if only 1 target left, find the closest vantage spot to character
-    returns vantage spot tuple
-    """
-    x_in, y_in = initial_loc
-    if len(targets) == 1:
-        xl, yl = list(targets)[0]
-        pot_best_points = {(xl, y_in), (x_in, yl)}
-    else:
-        xs: list = [t[0] for t in targets]
-        ys: list = [t[1] for t in targets]
-        pot_best_points:set[tuple[int, int]] = {(x, y) for x in xs for y in ys if (x, y) not in targets}
+    Returns:
+        SearchResult:
+            The status of the search, its solution if any, and the effort spent on it.
+    """
+    return AStarSearch(problem, heuristic, budget, stats, hooks, start, graph).run()
+
+def solve_iter(problem: "MazeProblem", heuristic: Optional[Heuristic] = None, budget: Optional[SearchBudget] = None,
+               batch_size: int = 1024) -> Generator[SearchProgress, None, SearchResult]:
+    """
+    Resumable counterpart of solve, as a generator expanding up to batch_size nodes each
+    time it is advanced, then yielding the search's progress; the caller regains control
+    between batches and may stop iterating at any time to abandon the search. See pathfind
+    for a description of the other parameters.
+
+    Parameters:
+        batch_size (int):
+            The most nodes expanded between two yields.
+
+    Returns:
+        Generator[SearchProgress, None, SearchResult]:
+            The progress after every batch; the SearchResult is the generator's return value
+            (the value of its StopIteration, or of a `yield from` expression).
+    """
+    search = AStarSearch(problem, heuristic, budget)
+    while (result := search.step(batch_size)) is None:
+        yield search.progress()
+    return result
+
+async def solve_async(problem: "MazeProblem", heuristic: Optional[Heuristic] = None, budget: Optional[SearchBudget] = None,
+                      batch_size: int = 1024, on_progress: Optional[Callable[[SearchProgress], None]] = None) -> SearchResult:
+    """
+    Cooperative counterpart of solve for asyncio applications, which expands up to
+    batch_size nodes at a time and yields to the event loop in between, so that other tasks
+    keep running during long searches. Cancelling the awaiting task stops the search at the
+    next batch boundary. Note that a budget's time_limit counts wall-clock time, including
+    the time spent running other tasks. See pathfind for a description of the other
+    parameters.
+
+    Parameters:
+        batch_size (int):
+            The most nodes expanded between two yields to the event loop.
+        on_progress (Optional[Callable[[SearchProgress], None]]):
+            If given, called with the search's progress after every batch.
+
+    Returns:
+        SearchResult:
+            The status of the search, its solution if any, and the effort spent on it.
+    """
+    import asyncio # deferred: it is much slower to import than the rest of this module
+    search = AStarSearch(problem, heuristic, budget)
+    try:
+        while (result := search.step(batch_size)) is None:
+            if on_progress is not None:
+                on_progress(search.progress())
+            await asyncio.sleep(0)
+    except asyncio.CancelledError:
+        search.cancel()
+        raise
+    return result
+
+async def pathfind_async(problem: "MazeProblem", heuristic: Optional[Heuristic] = None, budget: Optional[SearchBudget] = None,
+                         batch_size: int = 1024, on_progress: Optional[Callable[[SearchProgress], None]] = None) -> Optional[list[str]]:
+    """
+    Cooperative counterpart of pathfind for asyncio applications; see solve_async.
+
+    Returns:
+        Optional[list[str]]:
+            A solution to the problem, or None if there is none (or the budget ran out).
+    """
+    return (await solve_async(problem, heuristic, budget, batch_size, on_progress)).solution
+
+class AStarSearch:
+    """
+    The search core shared by solve, solve_iter and solve_async: an A* search that can be
+    run to completion in one call, or advanced a batch of expansions at a time. Between
+    batches, all of its state lives on the object; within a batch, the expansion loop works
+    on local variables only, so that batching costs nothing per expansion.
+    """
+    def __init__(self, problem: "MazeProblem", heuristic: Optional[Heuristic] = None, budget: Optional[SearchBudget] = None,
+                 stats: Optional[SearchStats] = None, hooks: Optional[SearchHooks] = None, start: Optional[SearchState] = None,
+                 graph: Optional["CorridorGraph"] = None) -> None:
+        """
+        Sets up a search of the given problem, without expanding anything yet. See solve for
+        a description of the parameters.
+        """
+        self._problem = problem
+        self._start_time = time.monotonic()
+        self._initial_state = start if start is not None else SearchState(problem.get_cell_id(problem.get_initial_loc()), problem.get_initial_target_mask())
+        budget = budget if budget is not None else SearchBudget()
+        self._nodes = NodePool(budget.max_nodes, graph.actions if graph is not None else Constants.MOVES)
+        self._frontier = Frontier()
+        self._best_g: dict[SearchState, int] = {self._initial_state: 0}
+        if heuristic is None:
+            heuristic = VantageHeuristic(problem)
+
+        (self._deadline, self._max_expansions, self._max_nodes) = budget.get_limits(self._start_time)
+        self._expansions: int = 0
+        self._best_partial: int = NodePool.ROOT
+        self._best_remaining: int = self._initial_state.targets_mask.bit_count() + 1
+        self._duplicates: int = 0
+        self._reopened: int = 0
+        self._stats = stats
+        self.result: Optional[SearchResult] = None
+
+        # Instrumentation is bound once up front so that the loop below only ever pays for it
+        # when it was asked for
+        self._get_moves: Callable[[int], tuple[tuple[int, int, int, int], ...]] = graph.get_moves if graph is not None else problem.get_moves
+        self._get_shot_mask: Callable[[int, int], int] = problem.get_shot_mask
+        self._estimate: Callable[[int, int], int] = heuristic
+        if stats is not None:
+            self._get_moves = _timed(self._get_moves, stats, "transitions_time")
+            self._get_shot_mask = _timed(self._get_shot_mask, stats, "visibility_time")
+            self._estimate = _timed(self._estimate, stats, "heuristic_time")
+        self._on_expand = hooks.on_expand if hooks is not None else None
+        self._on_goal = hooks.on_goal if hooks is not None else None
+
+        solvable = problem.is_solvable() if start is None else problem.is_solvable(problem.get_cell_loc(start.cell), start.targets_mask)
+        if not solvable:
+            self._finish(SearchResult(SearchStatus.UNSOLVABLE, None, -1, 0, []))
+            return
+        root = self._nodes.add(self._initial_state, -1, NodePool.ROOT, 0)
+        root_h: int = self._estimate(self._initial_state.cell, self._initial_state.targets_mask)
+        if root_h >= UNREACHABLE:
+            self._finish(SearchResult(SearchStatus.UNSOLVABLE, None, -1, 0, []))
+            return
+        self._frontier.push(self._initial_state, root, root_h, root_h)
+
+    def run(self) -> SearchResult:
+        """
+        Runs the search to completion.
+
+        Returns:
+            SearchResult:
+                The status of the search, its solution if any, and the effort spent on it.
+        """
+        result = self.step()
+        assert result is not None
+        return result
+
+    def progress(self) -> SearchProgress:
+        """
+        Returns a snapshot of the search's progress so far.
+
+        Returns:
+            SearchProgress:
+                The search's counters and the lowest f(n) on its frontier (-1 if it is empty).
+        """
+        best_f = self._frontier.peek_priority()
+        return SearchProgress(self._expansions, len(self._nodes), len(self._frontier), best_f if best_f is not None else -1, time.monotonic() - self._start_time)
+
+    def cancel(self) -> SearchResult:
+        """
+        Ends the search early, unless it is already over.
+
+        Returns:
+            SearchResult:
+                The search's result: CANCELLED along with the most progress made, unless it
+                had already ended.
+        """
+        if self.result is None:
+            self._finish(SearchResult(SearchStatus.CANCELLED, None, -1, self._expansions, self._partial_plan()))
+        assert self.result is not None
+        return self.result
+
+    def _partial_plan(self) -> list[str]:
+        """
+        Returns the path to the first expanded state with the fewest targets left.
+        """
+        return _create_goal_path(self._nodes, self._best_partial) if self._best_partial != NodePool.ROOT else []
+
+    def _finish(self, result: SearchResult) -> SearchResult:
+        """
+        Records the result of the search, along with its stats if requested.
 
-    vis_best_points: dict = {}
+        Parameters:
+            result (SearchResult):
+                How the search ended.
 
-    for point in pot_best_points:
-        temp:set[tuple[int, int]] = problem.get_visible_targets_from_loc(point, targets)
-        target_count: int = len(temp)
-        vis_best_points[point] = target_count
+        Returns:
+            SearchResult:
+                The same result.
+        """
+        self.result = result
+        stats = self._stats
+        if stats is not None:
+            stats.nodes_generated += len(self._nodes)
+            stats.nodes_expanded += self._expansions
+            stats.duplicates += self._duplicates
+            stats.reopened += self._reopened
+        return result
 
-    temp_target_counts: list[int] = []
-    for x in vis_best_points.values():
-        temp_target_counts.append(x)
-    max_target_vis: int = max(temp_target_counts)
+    def _give_up(self, reason: str) -> SearchResult:
+        """
+        Ends the search for running out of budget.
 
-    final_points:list[tuple[int, int]] = []
-    for best_points, best_count in vis_best_points.items():
-        if best_count == max_target_vis:
-            final_points.append(best_points)
+        Parameters:
+            reason (str):
+                The budget limit that was reached, for the log.
 
-    distances = [abs(xf - x_in) + abs(yf - y_in) for xf, yf in final_points]
-    min_distance_index = distances.index(min(distances))
-    goal_point = final_points[min_distance_index]
-    return goal_point
+        Returns:
+            SearchResult:
+                A BUDGET_EXHAUSTED result with the most progress made.
+        """
+        _log_warning("pathfind gave up after %d expansions: %s", self._expansions, reason)
+        return self._finish(SearchResult(SearchStatus.BUDGET_EXHAUSTED, None, -1, self._expansions, self._partial_plan()))
 
+    def step(self, batch_size: float = math.inf) -> Optional[SearchResult]:
+        """
+        Advances the search by up to batch_size expansions.
 
+        Parameters:
+            batch_size (float):
+                The most nodes to expand before pausing, unlimited by default.
 
-def _create_goal_path(last_move: str, current: Optional[SearchTreeNode]) -> list[str]:
+        Returns:
+            Optional[SearchResult]:
+                The search's result if it has ended, or None if it paused and can be resumed
+                with another call.
+        """
+        if self.result is not None:
+            return self.result
+        nodes, frontier, best_g = self._nodes, self._frontier, self._best_g
+        get_moves, get_shot_mask, estimate = self._get_moves, self._get_shot_mask, self._estimate
+        on_expand, on_goal, stats = self._on_expand, self._on_goal, self._stats
+        deadline, max_expansions, max_nodes = self._deadline, self._max_expansions, self._max_nodes
+        expansions, duplicates, reopened = self._expansions, self._duplicates, self._reopened
+        best_partial, best_remaining = self._best_partial, self._best_remaining
+        pause_at: float = expansions + batch_size
+        goal_node: int = NodePool.ROOT
+        give_up_reason: Optional[str] = None
+
+        # Fetch the cheapest node from the frontier and generate its children, keeping only those
+        # that improve on the best known cost of their state (which replaces any queued entry).
+        try:
+            while frontier:
+                if expansions >= pause_at:
+                    return None
+                expanding_node = frontier.pop()
+                state: SearchState = nodes.get_state(expanding_node)
+                node_cost: int = nodes.get_cost(expanding_node)
+                if not state.targets_mask:
+                    goal_node = expanding_node
+                    break
+                if expansions >= max_expansions:
+                    give_up_reason = "expansion limit reached"
+                    break
+                expansions += 1
+                if not expansions % 256:
+                    if time.monotonic() > deadline:
+                        give_up_reason = "time limit reached"
+                        break
+                    if len(nodes) > max_nodes:
+                        give_up_reason = "memory limit reached"
+                        break
+                remaining: int = state.targets_mask.bit_count()
+                if remaining < best_remaining:
+                    best_remaining, best_partial = remaining, expanding_node
+                if stats is not None:
+                    stats.peak_frontier = max(stats.peak_frontier, len(frontier) + 1)
+                if on_expand is not None:
+                    on_expand(state, node_cost)
+
+                for action_code, next_cell, cost, child_mask in get_successors(get_moves, get_shot_mask, state.cell, state.targets_mask):
+                    child_state = SearchState(next_cell, child_mask)
+                    child_cost: int = node_cost + cost
+                    old_cost: Optional[int] = best_g.get(child_state)
+                    if old_cost is not None:
+                        if child_cost >= old_cost:
+                            duplicates += 1
+                            continue
+                        reopened += 1
+                    child_h: int = estimate(next_cell, child_mask)
+                    if child_h >= UNREACHABLE:
+                        continue
+                    best_g[child_state] = child_cost
+                    frontier.push(child_state, nodes.add(child_state, action_code, expanding_node, child_cost), child_cost + child_h, child_h)
+        except NodePoolFullError:
+            give_up_reason = "node pool cap reached"
+        finally:
+            # Counters are kept in locals within a batch and saved before anything else reads them
+            self._expansions, self._duplicates, self._reopened = expansions, duplicates, reopened
+            self._best_partial, self._best_remaining = best_partial, best_remaining
+
+        if goal_node != NodePool.ROOT:
+            solution = _create_goal_path(nodes, goal_node)
+            cost = nodes.get_cost(goal_node)
+            if on_goal is not None:
+                on_goal(solution, cost)
+            return self._finish(SearchResult(SearchStatus.SOLVED, solution, cost, expansions, solution))
+        if give_up_reason is not None:
+            return self._give_up(give_up_reason)
+        return self._finish(SearchResult(SearchStatus.UNSOLVABLE, None, -1, expansions, self._partial_plan()))
+
+class AnytimePlan(NamedTuple):
+    """
+    One of the successively better plans streamed by solve_anytime.
+
+    Attributes:
+        solution (list[str]):
+            The sequence of actions found, solving the problem but not necessarily optimally.
+        cost (int):
+            The total cost of solution.
+        weight (float):
+            The heuristic weight of the search pass that reported the plan.
+        bound (float):
+            The plan's proven suboptimality bound: cost is at most bound times the optimal
+            cost, and a bound of 1.0 means the plan is optimal.
+        expansions (int):
+            The number of nodes expanded so far, over all passes.
+        elapsed (float):
+            Seconds since the search started.
+    """
+    solution: list[str]
+    cost: int
+    weight: float
+    bound: float
+    expansions: int
+    elapsed: float
+
+# Weighted priorities g(n) + w * h(n) are kept integral, as in Frontier, by scaling both terms
+_WEIGHT_SCALE: int = 1000
+
+def solve_anytime(problem: "MazeProblem", heuristic: Optional[Heuristic] = None, budget: Optional[SearchBudget] = None,
+                  initial_weight: float = 2.0, weight_step: float = 0.5) -> Iterator[AnytimePlan]:
+    """
+    Anytime counterpart of solve, for callers who would rather have a good plan now than the
+    optimal plan later: an ARA* search that runs weighted A* (ordering the frontier by
+    g(n) + w * h(n)) with a weight w decreasing from initial_weight down to 1, reporting each
+    plan found along the way with a bound on how far from optimal it may be. Each pass reuses
+    the search tree of the previous ones, only re-expanding the states whose cost improved,
+    so the whole sequence of passes costs little more than the final, unweighted one.
+
+    The search stops once a plan is proven optimal, or when the budget runs out; the last
+    plan streamed is then the best found, and its bound still holds. See pathfind for a
+    description of the other parameters; the heuristic should be consistent, as the default
+    one is, for the bounds to hold.
+
+    Parameters:
+        initial_weight (float):
+            The weight of the first pass, at least 1; higher weights find a first plan sooner.
+        weight_step (float):
+            How much the weight decreases between passes.
+
+    Returns:
+        Iterator[AnytimePlan]:
+            Every plan that improves on the cost or the bound of the previous one, in order;
+            nothing if the problem is unsolvable or the budget runs out before a first plan.
+
+    Raises:
+        ValueError:
+            If initial_weight is less than 1 or weight_step is not positive.
+    """
+    if initial_weight < 1 or weight_step <= 0:
+        raise ValueError("initial_weight must be at least 1 and weight_step positive")
+    start_time = time.monotonic()
+    budget = budget if budget is not None else SearchBudget()
+    (deadline, max_expansions, max_nodes) = budget.get_limits(start_time)
+    if heuristic is None:
+        heuristic = VantageHeuristic(problem)
+    if not problem.is_solvable():
+        return
+    initial_state = SearchState(problem.get_cell_id(problem.get_initial_loc()), problem.get_initial_target_mask())
+    initial_h: int = heuristic(initial_state.cell, initial_state.targets_mask)
+    if initial_h >= UNREACHABLE:
+        return
+
+    nodes = NodePool(budget.max_nodes)
+    # The best node and heuristic estimate of every state reached; a state's g(n) is its
+    # best node's cost
+    best_node: dict[SearchState, int] = {initial_state: nodes.add(initial_state, -1, NodePool.ROOT, 0)}
+    estimates: dict[SearchState, int] = {initial_state: initial_h}
+    # ARA*'s OPEN and INCONS lists: states queued in the current pass, and states whose cost
+    # improved after the current pass had expanded them, to be queued in the next one
+    open_states: set[SearchState] = {initial_state}
+    inconsistent: set[SearchState] = set()
+    # The goal node of the best plan found, which is the root if there are no targets at all
+    (incumbent, incumbent_cost) = (best_node[initial_state], 0) if not initial_state.targets_mask else (NodePool.ROOT, UNREACHABLE)
+    reported: tuple[int, float] = (UNREACHABLE, math.inf)
+    expansions: int = 0
+    weight = float(initial_weight)
+    exhausted = False
+
+    def improved_plan(weight_bound: float) -> Optional[AnytimePlan]:
+        # Every optimal plan passes through a state of OPEN or INCONS at its optimal cost, so
+        # their lowest g(n) + h(n) bounds the optimal cost from below; the weight of a pass
+        # also bounds the suboptimality of its plan, once the pass is complete
+        nonlocal reported
+        lower_bound = min((nodes.get_cost(best_node[state]) + estimates[state] for state in itertools.chain(open_states, inconsistent)), default=incumbent_cost)
+        bound = min(weight_bound, incumbent_cost / lower_bound if 0 < lower_bound < incumbent_cost else 1.0)
+        if (incumbent_cost, bound) >= reported:
+            return None
+        reported = (incumbent_cost, bound)
+        return AnytimePlan(_create_goal_path(nodes, incumbent), incumbent_cost, weight, bound, expansions, time.monotonic() - start_time)
+
+    while True:
+        scaled_weight = round(weight * _WEIGHT_SCALE)
+        open_states |= inconsistent
+        inconsistent = set()
+        closed: set[SearchState] = set()
+        frontier = Frontier()
+        for state in open_states:
+            node = best_node[state]
+            frontier.push(state, node, nodes.get_cost(node) * _WEIGHT_SCALE + scaled_weight * estimates[state], estimates[state])
+
+        # A weighted A* pass, which ends once no queued node can lead to a plan cheaper than
+        # the incumbent under the current weight
+        try:
+            while open_states:
+                top = frontier.peek_priority()
+                assert top is not None
+                if top >= incumbent_cost * _WEIGHT_SCALE:
+                    break
+                if expansions >= max_expansions or (not expansions % 256 and (time.monotonic() > deadline or len(nodes) > max_nodes)):
+                    exhausted = True
+                    break
+                expanding_node = frontier.pop()
+                state = nodes.get_state(expanding_node)
+                node_cost: int = nodes.get_cost(expanding_node)
+                open_states.discard(state)
+                closed.add(state)
+                if not state.targets_mask:
+                    continue
+                expansions += 1
+                found = False
+                for action_code, next_cell, cost, child_mask in get_successors(problem.get_moves, problem.get_shot_mask, state.cell, state.targets_mask):
+                    child_state = SearchState(next_cell, child_mask)
+                    child_cost: int = node_cost + cost
+                    old_node: Optional[int] = best_node.get(child_state)
+                    if old_node is not None and child_cost >= nodes.get_cost(old_node):
+                        continue
+                    child_h: Optional[int] = estimates.get(child_state)
+                    if child_h is None:
+                        child_h = estimates[child_state] = heuristic(next_cell, child_mask)
+                    if child_h >= UNREACHABLE:
+                        continue
+                    child_node = best_node[child_state] = nodes.add(child_state, action_code, expanding_node, child_cost)
+                    if not child_mask and child_cost < incumbent_cost:
+                        incumbent, incumbent_cost, found = child_node, child_cost, True
+                    if child_state in closed:
+                        inconsistent.add(child_state)
+                    else:
+                        open_states.add(child_state)
+                        frontier.push(child_state, child_node, child_cost * _WEIGHT_SCALE + scaled_weight * child_h, child_h)
+                # Plans are streamed as soon as they are found, rather than at the end of the pass
+                if found and (plan := improved_plan(math.inf)) is not None:
+                    yield plan
+        except NodePoolFullError:
+            exhausted = True
+
+        if incumbent == NodePool.ROOT:
+            if exhausted or not open_states:
+                _log_warning("anytime pathfind found no plan after %d expansions", expansions)
+                return
+        else:
+            if (plan := improved_plan(math.inf if exhausted else weight)) is not None:
+                yield plan
+            if exhausted or reported[1] <= 1.0:
+                return
+        weight = max(1.0, weight - weight_step)
+
+def pathfind_anytime(problem: "MazeProblem", heuristic: Optional[Heuristic] = None, budget: Optional[SearchBudget] = None,
+                     on_plan: Optional[Callable[[AnytimePlan], None]] = None, initial_weight: float = 2.0, weight_step: float = 0.5) -> Optional[list[str]]:
+    """
+    Anytime counterpart of pathfind, streaming its improving plans through a callback; see
+    solve_anytime. Given a time limit in its budget, it returns the best plan found within it.
+
+    Parameters:
+        on_plan (Optional[Callable[[AnytimePlan], None]]):
+            If given, called with every plan as soon as it is found.
+
+    Returns:
+        Optional[list[str]]:
+            The best plan found, optimal unless the budget ran out, or None if there is none.
+    """
+    solution: Optional[list[str]] = None
+    for plan in solve_anytime(problem, heuristic, budget, initial_weight, weight_step):
+        if on_plan is not None:
+            on_plan(plan)
+        solution = plan.solution
+    return solution
+
+def _create_goal_path(nodes: NodePool, current: int) -> list[str]:
     """
     If the goal has been reached, then this method, _create_goal_path, will create the list[str] path from the initial
     state to the goal state. 
 
     Parameters:
-        last_move (str):
-            The last_move string is essentially the last move made from the maze to reach the goal.
-        last_node_expanded (SearchTreeNode):
-            The last_node_expanded is the final node that is expaneded from the tree that showed the goal state.
+        nodes (NodePool):
+            The pool holding the search tree.
+        current (int):
+            The index of the goal node reached by the search, whose chain of parents leads back to the root.
 
     Returns:
         list[str]:
             The solution to the problem: a sequence of actions leading from the 
             initial state to the goal.
     """
+    path: list[str] = []
+    while nodes.get_parent(current) != NodePool.ROOT: # collects each move and assigns current to be parent
+        path.extend(reversed(nodes.get_action(current))) # compressed corridors unfold into single steps
+        current = nodes.get_parent(current)
+    path.reverse()
+    return path
 
-    path: str = last_move
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Command line entry point, `python -m pathfinder MAZE_FILE`, which solves the maze in the
+    given file and prints how the search ended, then the solution and its cost if any. It is
+    meant to be started afresh for every job, so importing this module does as little as
+    possible, and the modules behind each option are only imported when it is used.
 
-    # Test Case: if the last_node_expanded is None, then return the last move made in a list.
-    if current == None:
-        return [last_move]
+    Parameters:
+        argv (Optional[list[str]]):
+            The command line arguments, defaulting to sys.argv[1:].
+
+    Returns:
+        int:
+            The exit status: 0 if a solution was found, 1 otherwise.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m pathfinder", description="Solves a target practice maze with A* search.")
+    parser.add_argument("maze", help="file holding the maze, one row per line")
+    parser.add_argument("--index-cache", metavar="FILE", help="read the maze's distance tables from FILE, or compute and save them there if it does not hold them")
+    parser.add_argument("--time-limit", type=float, metavar="SECONDS", help="give up after this many seconds")
+    parser.add_argument("--corridors", action="store_true", help="search the maze's compressed corridor graph (no help in open rooms)")
+    parser.add_argument("--workers", type=int, help="search with this many processes (parallel HDA*, which ignores the other options)")
+    args = parser.parse_args(argv)
+    problem = MazeProblem.from_file(args.maze)
+    budget = SearchBudget(time_limit=args.time_limit)
+    if args.workers is not None:
+        from parallel_astar import solve_parallel
+        result = solve_parallel(problem, args.workers, budget)
+    else:
+        distances = VantageDistances.from_cache(problem, args.index_cache) if args.index_cache is not None else None
+        graph = None
+        if args.corridors:
+            from corridor_graph import CorridorGraph
+            graph = CorridorGraph(problem)
+        result = solve(problem, VantageHeuristic(problem, distances), budget, graph=graph)
+    # Statuses are compared by value, since this module runs as __main__ while parallel_astar
+    # imports it anew as pathfinder
+    print(result.status.value)
+    if result.solution is None:
+        return 1
+    print(" ".join(result.solution))
+    print(result.cost)
+    return 0
 
-    while current is not None: # updates path with each move and assigns current to be parent
-        path += current.action
-        current = current.parent
-    path = path[::-1]
-    return list(path)
+if __name__ == "__main__":
+    raise SystemExit(main())
 
     # ===================================================
 # >>> [SC] Summary
@@ -1,4 +1,21 @@
 from pathfinder import *
+from heuristics import *
+from batch_solver import pathfind_many, verify_solutions
+from maze_generator import generate_maze, load_corpus
+from replanning import ReplanningPlanner
+from solution_cache import SolutionCache
+from shot_planner import solve_by_shots, pathfind_by_shots
+from corridor_graph import CorridorGraph
+from parallel_astar import solve_parallel, pathfind_parallel, _await_reply
+import asyncio
+import contextlib
+import importlib.util
+import io
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
 
 class PathfinderTests(unittest.TestCase):
@@ -123,6 +140,20 @@ class PathfinderTests(unittest.TestCase):
         
         self.run_maze(maze, True, 14)
         
+    def test_pathfinder_t6(self) -> None:
+        maze = [
+           # 01234567
+            "XXXXXXXX", # 0
+            "XMMXXMXX", # 1
+            "XT@.MTMX", # 2
+            "XT.XX..X", # 3
+            "XM..XM.X", # 4
+            "X.TTTX.X", # 5
+            "XXXXXXXX", # 6
+        ]
+        
+        self.run_maze(maze, True, 8)
+        
     # Tests with NO solutions
     # ---------------------------------------------------------------------------
     def test_pathfinder_nosoln_t0(self) -> None:
@@ -149,5 +180,634 @@ class PathfinderTests(unittest.TestCase):
         
         self.run_maze(maze, False)
         
+    def test_pathfinder_nosoln_t2(self) -> None:
+        maze = [
+           # 0123456
+            "XXXXXXX", # 0
+            "X@.X.TX", # 1
+            "X..X..X", # 2
+            "XXXXXXX", # 3
+        ]
+        
+        self.run_maze(maze, False)
+        self.assertFalse(MazeProblem(maze).is_solvable())
+        
+    # MazeProblem tests
+    # ---------------------------------------------------------------------------
+    def test_visible_targets_stop_at_walls(self) -> None:
+        maze = [
+           # 0123456
+            "XXXXXXX", # 0
+            "XT.XT.X", # 1
+            "X..T..X", # 2
+            "XT@.X.X", # 3
+            "XT....X", # 4
+            "XXXXXXX", # 5
+        ]
+        problem = MazeProblem(maze)
+        targets = problem.get_initial_targets()
+        
+        self.assertEqual(problem.get_visible_targets_from_loc((1, 2), targets), {(1, 1), (1, 3), (1, 4), (3, 2)})
+        self.assertEqual(problem.get_visible_targets_from_loc((4, 2), targets), {(3, 2), (4, 1)})
+        self.assertEqual(problem.get_visible_targets_from_loc((5, 3), targets), set())
+        self.assertEqual(problem.get_visible_targets_from_loc((3, 3), {(1, 3)}), {(1, 3)})
+        
+    def test_target_masks_round_trip(self) -> None:
+        maze = [
+           # 012345
+            "XXXXXX", # 0
+            "XT..TX", # 1
+            "X.X..X", # 2
+            "X@.T.X", # 3
+            "XXXXXX", # 4
+        ]
+        problem = MazeProblem(maze)
+        targets = problem.get_initial_targets()
+        mask = problem.get_initial_target_mask()
+        
+        self.assertEqual(problem.get_target_mask(targets), mask)
+        self.assertIs(problem.get_initial_targets(), targets)
+        self.assertIsInstance(targets, frozenset)
+        self.assertEqual(problem.test_solution(["R", "R", "S"]), {"is_solution": False, "cost": -1})
+        self.assertEqual(problem.get_targets_from_mask(mask), targets)
+        self.assertEqual(problem.get_targets_from_mask(problem.get_visible_target_mask((4, 3), mask)), {(3, 3), (4, 1)})
+        self.assertEqual(problem.get_cell_loc(problem.get_cell_id((4, 3))), (4, 3))
+        self.assertEqual(SearchState(problem.get_cell_id((1, 3)), mask), SearchState(19, 7))
+        
+    def test_move_table_matches_transitions(self) -> None:
+        maze = [
+           # 01234
+            "XXXXX", # 0
+            "X.TMX", # 1
+            "XM@.X", # 2
+            "XXXXX", # 3
+        ]
+        problem = MazeProblem(maze)
+        cell = problem.get_cell_id((2, 2))
+        target_bit = problem.get_target_mask({(2, 1)})
+        
+        self.assertEqual(problem.get_moves(cell), (
+            (0, problem.get_cell_id((2, 1)), 1, target_bit),
+            (2, problem.get_cell_id((1, 2)), 3, 0),
+            (3, problem.get_cell_id((3, 2)), 1, 0),
+        ))
+        self.assertIs(problem.get_moves(cell), problem.get_moves(cell))
+        self.assertEqual(set(problem.get_transitions((2, 2), problem.get_initial_targets())), {"L", "R", "S"})
+        self.assertEqual(problem.get_shot_mask(cell, problem.get_initial_target_mask()), target_bit)
+        
+    def test_vantage_distances(self) -> None:
+        maze = [
+           # 0123456
+            "XXXXXXX", # 0
+            "XT.X..X", # 1
+            "X..XM.X", # 2
+            "X.@...X", # 3
+            "XXXXXXX", # 4
+        ]
+        problem = MazeProblem(maze)
+        table = VantageDistances(problem).get_table(0)
+        heuristic = VantageHeuristic(problem)
+        mask = problem.get_initial_target_mask()
+        
+        self.assertEqual(table[problem.get_cell_id((1, 3))], 0)
+        self.assertEqual(table[problem.get_cell_id((2, 3))], 1)
+        self.assertEqual(table[problem.get_cell_id((4, 1))], 7)
+        self.assertEqual(heuristic(problem.get_cell_id((2, 3)), mask), 3)
+        self.assertEqual(heuristic(problem.get_cell_id((2, 3)), 0), 0)
+        heuristics: list[Heuristic] = [NullHeuristic(), LineHeuristic(problem), heuristic, SpanningTreeHeuristic(problem)]
+        for h in heuristics:
+            self.assertEqual(problem.test_solution(pathfind(problem, heuristic=h))["cost"], 3)
+        
+    def test_set_tile_repairs_visibility_and_distances(self) -> None:
+        maze = [
+           # 0123456
+            "XXXXXXX", # 0
+            "XT.X..X", # 1
+            "X..XM.X", # 2
+            "X.@...X", # 3
+            "XXXXXXX", # 4
+        ]
+        problem = MazeProblem(maze)
+        distances = VantageDistances(problem)
+        door = problem.get_cell_id((3, 1))
+        
+        problem.set_tile((3, 1), Constants.SAFE_BLOCK)
+        distances.repair(door, 0)
+        self.assertEqual(problem.get_visible_targets_from_loc((5, 1), problem.get_initial_targets()), {(1, 1)})
+        self.assertEqual(distances.get_table(0)[problem.get_cell_id((4, 2))], 1)
+        problem.set_tile((3, 1), Constants.WALL_BLOCK)
+        distances.repair(door, 1)
+        self.assertEqual(problem.get_visible_targets_from_loc((5, 1), problem.get_initial_targets()), set())
+        self.assertEqual(list(distances.get_table(0)), list(VantageDistances(MazeProblem(maze)).get_table(0)))
+        problem.set_tile((2, 2), Constants.MUD_BLOCK)
+        distances.repair(problem.get_cell_id((2, 2)), 1)
+        self.assertEqual(problem.get_cell_cost(problem.get_cell_id((2, 2))), Constants.MUD_TILE_COST)
+        self.assertEqual(problem.test_solution(pathfind(problem))["cost"], 3)
+        for loc in [(1, 1), (2, 3), (7, 1)]:
+            with self.assertRaises(ValueError):
+                problem.set_tile(loc, Constants.WALL_BLOCK)
+        
+    def test_verify_solution_reports_failed_step(self) -> None:
+        maze = [
+           # 012345
+            "XXXXXX", # 0
+            "XT..TX", # 1
+            "X.X..X", # 2
+            "X@.T.X", # 3
+            "XXXXXX", # 4
+        ]
+        problem = MazeProblem(maze)
+        solution = pathfind(problem)
+        
+        self.assertEqual(problem.verify_solution(solution), {"is_solution": True, "cost": problem.test_solution(solution)["cost"], "failed_step": -1})
+        self.assertEqual(problem.verify_solution(["U", "L", "S"])["failed_step"], 1)
+        self.assertEqual(problem.verify_solution(["S", "R", "R", "X"])["failed_step"], 3)
+        self.assertEqual(problem.verify_solution(["R", "R"])["failed_step"], 1)
+        self.assertEqual(problem.verify_solution(["S"]), {"is_solution": False, "cost": 2, "failed_step": 1})
+        self.assertEqual(problem.verify_solution(None)["failed_step"], 0)
+        self.assertEqual(verify_solutions([(maze, solution), (maze, ["D"]), (problem, [])]), [
+            problem.verify_solution(solution), problem.verify_solution(["D"]), problem.verify_solution([]),
+        ])
+        
+    def test_maze_from_file(self) -> None:
+        maze = [
+           # 012345
+            "XXXXXX", # 0
+            "XTM.XX", # 1
+            "XXMX.X", # 2
+            "XX@X.X", # 3
+            "X.M.TX", # 4
+            "XXXXXX", # 5
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "maze.txt")
+            with open(path, "w", newline="") as maze_file:
+                maze_file.write("\r\n".join(maze) + "\r\n")
+            problem = MazeProblem.from_file(path)
+            # Ragged rows are rejected even when the file's length is a multiple of the width
+            for contents in ["XXXXXX\nX@.TX\nXXXXXXX\n", "XXXXXX\r\nX@..TX\nXXXXXX\r\n", "XXXXXX\nX@..TX\nXXXXX", "XXXXX\nX@.TX\nXXXXXXXXXX", "XXXXX\nX..TX\nXXXXX\n", ""]:
+                with open(path, "w", newline="") as maze_file:
+                    maze_file.write(contents)
+                with self.assertRaises(ValueError):
+                    MazeProblem.from_file(path)
+        
+        self.assertEqual(problem.get_initial_loc(), (2, 3))
+        self.assertEqual(problem.get_initial_targets(), {(1, 1), (4, 4)})
+        self.assertEqual(problem.get_transition_cost("U", (2, 2)), 3)
+        self.assertEqual(problem.test_solution(pathfind(problem))["cost"], 14)
+        self.assertEqual(MazeProblem([row.encode() for row in maze]).get_initial_targets(), {(1, 1), (4, 4)})
+        with self.assertRaisesRegex(ValueError, "no player"):
+            MazeProblem(["XXXXX", "X..TX", "XXXXX"])
+
+    def test_vantage_distances_cache_file(self) -> None:
+        problem = MazeProblem(generate_maze(15, 15, seed=2, targets=4))
+        distances = VantageDistances(problem)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "maze.index")
+            self.assertIsNone(VantageDistances.load(problem, path))
+            distances.save(path)
+            loaded = VantageDistances.load(problem, path)
+            assert loaded is not None
+            self.assertEqual([loaded.get_table(i) for i in range(4)], [distances.get_table(i) for i in range(4)])
+            self.assertIsNone(VantageDistances.load(MazeProblem(generate_maze(15, 15, seed=3, targets=4)), path))
+            other = MazeProblem(generate_maze(15, 15, seed=3, targets=4))
+            self.assertEqual(VantageDistances.from_cache(other, path).get_table(0), VantageDistances(other).get_table(0))
+            self.assertIsNotNone(VantageDistances.load(other, path))
+            with open(path, "rb") as cache_file:
+                self.assertEqual(cache_file.read(), VantageDistances(other).to_bytes())
+        
+        # Tables shared through a buffer are views of it, laid out like the cache files
+        buffer = memoryview(bytearray(distances.to_bytes() + bytes(8)))
+        shared = VantageDistances.from_buffer(problem, buffer)
+        assert shared is not None
+        self.assertEqual([list(shared.get_table(i)) for i in range(4)], [list(distances.get_table(i)) for i in range(4)])
+        self.assertIsNone(VantageDistances.from_buffer(other, buffer))
+        self.assertIsNone(VantageDistances.from_buffer(problem, buffer[:len(buffer) // 2]))
+
+    def test_main_entry_point(self) -> None:
+        maze = ["XXXXXX", "XT...X", "X.XT.X", "X@..TX", "XXXXXX"]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "maze.txt")
+            with open(path, "w") as maze_file:
+                maze_file.write("\n".join(maze))
+            for options in [[], ["--corridors"], ["--index-cache", os.path.join(temp_dir, "maze.index")]]:
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    self.assertEqual(main([path] + options), 0)
+                (status, solution, cost) = output.getvalue().splitlines()
+                self.assertEqual((status, cost), ("solved", "6"))
+                self.assertEqual(MazeProblem(maze).test_solution(solution.split()), {"is_solution": True, "cost": 6})
+        # Optional and slow-to-import modules stay unloaded until an option needs them
+        imported = subprocess.run(
+            [sys.executable, "-c", "import pathfinder, sys; print(*sorted({'asyncio', 'dataclasses', 'logging', 'multiprocessing', 'numpy'} & set(sys.modules)))"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(imported.stdout.strip(), "")
+        
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "NumPy is not installed")
+    def test_numpy_backend_maps(self) -> None:
+        from maze_numpy import NumpyMazeBackend
+        maze = [
+           # 0123456
+            "XXXXXXX", # 0
+            "XT.XT.X", # 1
+            "X..T..X", # 2
+            "XTM.X.X", # 3
+            "XT..@.X", # 4
+            "XXXXXXX", # 5
+        ]
+        problem = MazeProblem(maze)
+        backend = NumpyMazeBackend(problem)
+        mask = problem.get_initial_target_mask()
+        counts = backend.shot_count_map(mask)
+        costs = backend.cost_map()
+        
+        (width, height) = problem.get_dimensions()
+        for y in range(height):
+            for x in range(width):
+                cell = problem.get_cell_id((x, y))
+                self.assertEqual(counts[y, x], problem.get_visible_target_mask((x, y), mask).bit_count())
+                self.assertEqual(costs[y, x], problem.get_cell_cost(cell))
+        self.assertEqual(backend.max_shot_hits(mask), 4)
+        self.assertEqual(backend.shootable_map(mask, 4).sum(), 1)
+        self.assertEqual(problem.test_solution(pathfind(problem, heuristic=VantageHeuristic(problem, backend=backend)))["is_solution"], True)
+        
+        # The backend follows changes to the maze's walls
+        problem.set_tile((2, 2), Constants.WALL_BLOCK)
+        problem.set_tile((2, 3), Constants.SAFE_BLOCK)
+        counts = backend.shot_count_map(mask)
+        costs = backend.cost_map()
+        for y in range(height):
+            for x in range(width):
+                cell = problem.get_cell_id((x, y))
+                self.assertEqual(counts[y, x], problem.get_visible_target_mask((x, y), mask).bit_count())
+                self.assertEqual(costs[y, x], problem.get_cell_cost(cell))
+        
+    def test_pathfinder_node_cap(self) -> None:
+        maze = [
+           # 012345
+            "XXXXXX", # 0
+            "XT...X", # 1
+            "X.XT.X", # 2
+            "X@..TX", # 3
+            "XXXXXX", # 4
+        ]
+        problem = MazeProblem(maze)
+        
+        with self.assertLogs("pathfinder", "WARNING"):
+            self.assertIsNone(pathfind(problem, budget=SearchBudget(max_nodes=3)))
+        self.assertEqual(problem.test_solution(pathfind(problem, budget=SearchBudget(max_nodes=1000)))["cost"], 6)
+        
+    def test_frontier_orders_and_decreases_keys(self) -> None:
+        frontier = Frontier()
+        frontier.push(SearchState(1, 1), 0, 5, 3)
+        frontier.push(SearchState(2, 1), 1, 5, 1)
+        frontier.push(SearchState(3, 1), 2, 4, 4)
+        frontier.push(SearchState(1, 1), 3, 3, 3)
+        
+        self.assertEqual(len(frontier), 3)
+        self.assertEqual([frontier.pop() for _ in range(3)], [3, 2, 1])
+        self.assertFalse(frontier)
+        self.assertRaises(IndexError, frontier.pop)
+        
+    def test_solve_reports_status(self) -> None:
+        maze = [
+           # 012345
+            "XXXXXX", # 0
+            "XT...X", # 1
+            "X.XT.X", # 2
+            "X@..TX", # 3
+            "XXXXXX", # 4
+        ]
+        problem = MazeProblem(maze)
+        solved = solve(problem)
+        
+        self.assertEqual(solved.status, SearchStatus.SOLVED)
+        self.assertEqual(solved.partial_plan, solved.solution)
+        with self.assertLogs("pathfinder", "WARNING"):
+            exhausted = solve(problem, budget=SearchBudget(max_expansions=2))
+        self.assertEqual(exhausted.status, SearchStatus.BUDGET_EXHAUSTED)
+        self.assertIsNone(exhausted.solution)
+        self.assertEqual(exhausted.expansions, 2)
+        self.assertEqual(solve(MazeProblem(["XXXXXX", "XTX.TX", "XX...X", "X@...X", "XXXXXX"])).status, SearchStatus.UNSOLVABLE)
+        
+    def test_pathfinder_stats_and_hooks(self) -> None:
+        maze = [
+           # 012345
+            "XXXXXX", # 0
+            "XTM.XX", # 1
+            "XXMX.X", # 2
+            "XX@X.X", # 3
+            "X.M.TX", # 4
+            "XXXXXX", # 5
+        ]
+        problem = MazeProblem(maze)
+        stats = SearchStats()
+        expanded: list[SearchState] = []
+        goals: list[int] = []
+        hooks = SearchHooks(on_expand=lambda state, cost: expanded.append(state), on_goal=lambda solution, cost: goals.append(cost))
+        result = solve(problem, stats=stats, hooks=hooks)
+        
+        self.assertEqual(goals, [14])
+        self.assertEqual(stats.nodes_expanded, result.expansions)
+        self.assertEqual(len(expanded), result.expansions)
+        self.assertEqual(expanded[0], SearchState(problem.get_cell_id((2, 3)), problem.get_initial_target_mask()))
+        self.assertGreaterEqual(stats.nodes_generated, stats.nodes_expanded)
+        self.assertGreater(stats.peak_frontier, 0)
+        self.assertGreater(stats.heuristic_time, 0)
+
+    def test_corridor_graph_compresses_corridors(self) -> None:
+        maze = [
+           # 012345678
+            "XXXXXXXXX", # 0
+            "X@.....MX", # 1
+            "XXXXXXX.X", # 2
+            "X.....M.X", # 3
+            "X.XXXXXXX", # 4
+            "X...T...X", # 5
+            "XXXXXXXXX", # 6
+        ]
+        problem = MazeProblem(maze)
+        graph = CorridorGraph(problem)
+        result = solve(problem, graph=graph)
+
+        self.assertEqual(result.solution, list("RRRRRRDDLLLLLLDDS"))
+        self.assertEqual(result.cost, 22)
+        self.assertEqual(result.expansions, 2)
+        self.assertEqual([graph.is_junction(problem.get_cell_id(loc)) for loc in [(1, 1), (7, 1), (1, 3), (1, 5), (4, 5)]], [True, False, False, True, True])
+        self.assertEqual(graph.get_moves(problem.get_cell_id((1, 1))), ((graph.actions.index("RRRRRRDDLLLLLLDD"), problem.get_cell_id((1, 5)), 20, 0),))
+        for seed in range(10):
+            problem = MazeProblem(generate_maze(12, 12, seed=seed, wall_density=0.4, targets=4))
+            self.assertEqual(solve(problem, graph=CorridorGraph(problem)).cost, solve(problem).cost)
+        
+    # Resumable search tests
+    # ---------------------------------------------------------------------------
+    def test_solve_iter_yields_between_batches(self) -> None:
+        problem = MazeProblem(generate_maze(12, 12, seed=1, targets=4, solvable=True))
+        expected = solve(problem)
+        progress = []
+        
+        steps = solve_iter(problem, batch_size=5)
+        while True:
+            try:
+                progress.append(next(steps))
+            except StopIteration as stop:
+                result = stop.value
+                break
+        self.assertEqual((result.status, result.cost, result.expansions), (SearchStatus.SOLVED, expected.cost, expected.expansions))
+        self.assertEqual(len(progress), (expected.expansions - 1) // 5)
+        self.assertEqual([p.expansions for p in progress], [5 * (i + 1) for i in range(len(progress))])
+        self.assertTrue(all(p.best_f <= expected.cost for p in progress))
+        
+        search = AStarSearch(problem)
+        self.assertIsNone(search.step(3))
+        cancelled = search.cancel()
+        self.assertEqual((cancelled.status, cancelled.expansions), (SearchStatus.CANCELLED, 3))
+        self.assertIs(search.step(), cancelled)
+        
+    def test_solve_async(self) -> None:
+        problem = MazeProblem(generate_maze(12, 12, seed=1, targets=4, solvable=True))
+        expected = solve(problem).cost
+        progress: list[SearchProgress] = []
+        
+        async def solve_with_ticker() -> tuple[SearchResult, int]:
+            ticks = 0
+            async def ticker() -> None:
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0)
+            ticking = asyncio.create_task(ticker())
+            result = await solve_async(problem, batch_size=5, on_progress=progress.append)
+            ticking.cancel()
+            return result, ticks
+        (result, ticks) = asyncio.run(solve_with_ticker())
+        self.assertEqual(result.cost, expected)
+        self.assertGreater(ticks, 1)
+        self.assertGreater(len(progress), 0)
+        self.assertGreaterEqual(ticks, len(progress))
+        self.assertEqual(asyncio.run(pathfind_async(problem)), result.solution)
+        
+        async def cancel_early() -> None:
+            task = asyncio.create_task(solve_async(problem, batch_size=1))
+            await asyncio.sleep(0)
+            task.cancel()
+            await task
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(cancel_early())
+
+    def test_solve_anytime_refines_to_optimal(self) -> None:
+        for seed in range(10):
+            problem = MazeProblem(generate_maze(14, 14, seed=seed, targets=5, solvable=True))
+            expected = solve(problem).cost
+            plans = list(solve_anytime(problem, initial_weight=3.0))
+            self.assertGreater(len(plans), 0)
+            for plan in plans:
+                self.assertEqual(problem.test_solution(plan.solution), {"is_solution": True, "cost": plan.cost})
+                self.assertLessEqual(plan.cost, plan.bound * expected)
+            for (earlier, later) in zip(plans, plans[1:]):
+                self.assertLessEqual(later.cost, earlier.cost)
+                self.assertLessEqual(later.bound, earlier.bound)
+            self.assertEqual((plans[-1].cost, plans[-1].bound), (expected, 1.0))
+
+        streamed: list[AnytimePlan] = []
+        solution = pathfind_anytime(problem, on_plan=streamed.append)
+        self.assertEqual(solution, streamed[-1].solution)
+        self.assertIsNone(pathfind_anytime(MazeProblem(["XXXXXX", "XTX..X", "XX...X", "X@...X", "XXXXXX"])))
+        with self.assertRaises(ValueError):
+            next(solve_anytime(problem, initial_weight=0.5))
+
+    # Replanning planner tests
+    # ---------------------------------------------------------------------------
+    def test_replanning_planner_reuses_plan(self) -> None:
+        maze = [
+           # 0123456
+            "XXXXXXX", # 0
+            "XT..X.X", # 1
+            "X..MT.X", # 2
+            "X@...TX", # 3
+            "XXXXXXX", # 4
+        ]
+        problem = MazeProblem(maze)
+        planner = ReplanningPlanner(problem)
+        first = planner.plan()
+        self.assertEqual(first.cost, solve(MazeProblem(maze)).cost)
+        
+        # Follow the plan, reporting each move and destroyed target as a delta
+        assert first.solution is not None
+        (x, y) = problem.get_initial_loc()
+        spent = 0
+        for action in first.solution:
+            if action == "S":
+                state = planner.get_state()
+                for target in problem.get_targets_from_mask(problem.get_shot_mask(state.cell, state.targets_mask)):
+                    planner.remove_target(target)
+                spent += Constants.SHOOTING_COST
+            else:
+                (dx, dy) = Constants.MOVE_DIRS[action]
+                (x, y) = (x + dx, y + dy)
+                planner.move_player((x, y))
+                spent += problem.get_cell_cost(problem.get_cell_id((x, y)))
+            replan = planner.plan()
+            self.assertEqual(replan.expansions, 0)
+            self.assertEqual(replan.cost, first.cost - spent)
+        self.assertEqual(planner.get_state().targets_mask, 0)
+        
+    def test_replanning_planner_after_changes(self) -> None:
+        maze = [
+           # 0123456
+            "XXXXXXX", # 0
+            "XT..X.X", # 1
+            "X..MT.X", # 2
+            "X@...TX", # 3
+            "XXXXXXX", # 4
+        ]
+        planner = ReplanningPlanner(MazeProblem(maze))
+        planner.plan()
+        
+        planner.remove_target((1, 1))
+        planner.move_player((2, 3))
+        planner.set_tile((4, 1), Constants.SAFE_BLOCK)
+        planner.set_tile((3, 3), Constants.WALL_BLOCK)
+        changed = MazeProblem([
+            "XXXXXXX",
+            "X.....X",
+            "X..MT.X",
+            "X.@X.TX",
+            "XXXXXXX",
+        ])
+        self.assertEqual(planner.plan().cost, solve(changed).cost)
+        with self.assertRaises(ValueError):
+            planner.remove_target((1, 1))
+        with self.assertRaises(ValueError):
+            planner.move_player((3, 3))
+        # Neither the tile the player stands on nor the one it started from may change
+        for loc in [(2, 3), (1, 3)]:
+            with self.assertRaisesRegex(ValueError, "under the player"):
+                planner.set_tile(loc, Constants.MUD_BLOCK)
+        
+    # Solution cache tests
+    # ---------------------------------------------------------------------------
+    def test_solution_cache_shares_symmetric_mazes(self) -> None:
+        maze = [
+           # 0123456
+            "XXXXXXX", # 0
+            "XT..X.X", # 1
+            "X..MT.X", # 2
+            "X@...TX", # 3
+            "XXXXXXX", # 4
+        ]
+        rotated = ["".join(row[x] for row in reversed(maze)) for x in range(len(maze[0]))]
+        mirrored = [row[::-1] for row in maze]
+        cache = SolutionCache(capacity=2)
+        expected = solve(MazeProblem(maze)).cost
+        
+        for variant in [maze, rotated, mirrored, maze]:
+            problem = MazeProblem(variant)
+            self.assertEqual(problem.test_solution(cache.pathfind(problem)), {"is_solution": True, "cost": expected})
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (3, 1, 1))
+        
+        # The least recently used maze is evicted first, and unsolvable mazes are cached too
+        unsolvable = ["XXXXXX", "XTX.TX", "XX...X", "X@...X", "XXXXXX"]
+        self.assertIsNone(cache.pathfind(MazeProblem(unsolvable)))
+        cache.pathfind(MazeProblem(["XXXXXX", "XT...X", "X....X", "X@...X", "XXXXXX"]))
+        self.assertIsNone(cache.get(MazeProblem(maze)))
+        self.assertEqual(cache.solve(MazeProblem(unsolvable)).status, SearchStatus.UNSOLVABLE)
+        
+        # Searches cut short are not cached, lest they be served back as unsolvable
+        for status in [SearchStatus.CANCELLED, SearchStatus.BUDGET_EXHAUSTED]:
+            cache.put(MazeProblem(maze), SearchResult(status, None, -1, 10, []))
+            self.assertIsNone(cache.get(MazeProblem(maze)))
+        
+    def test_solution_cache_disk_tier(self) -> None:
+        maze = ["XXXXXX", "XT...X", "X.XT.X", "X@..TX", "XXXXXX"]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "solutions")
+            with SolutionCache(path=path) as cache:
+                cache.pathfind(MazeProblem(maze))
+            with SolutionCache(path=path) as cache:
+                result = cache.get(MazeProblem(maze[::-1]))
+                self.assertEqual((cache.hits, cache.disk_hits, cache.misses), (1, 1, 0))
+        assert result is not None
+        self.assertEqual(MazeProblem(maze[::-1]).test_solution(result.solution), {"is_solution": True, "cost": 6})
+        
+    # Shot planner tests
+    # ---------------------------------------------------------------------------
+    def test_solve_by_shots_matches_pathfind(self) -> None:
+        maze = [
+           # 01234567
+            "XXXXXXXX", # 0
+            "XT..X.TX", # 1
+            "X..MT..X", # 2
+            "X@.X.XTX", # 3
+            "XT.M...X", # 4
+            "XXXXXXXX", # 5
+        ]
+        problem = MazeProblem(maze)
+        expected = solve(problem).cost
+        
+        for exact_limit in [8, 0]:
+            result = solve_by_shots(problem, exact_limit=exact_limit)
+            self.assertEqual((result.status, result.cost, result.optimal), (SearchStatus.SOLVED, expected, True))
+            self.assertEqual(problem.test_solution(result.solution), {"is_solution": True, "cost": expected})
+        
+        # Branch and bound keeps its best plan when it runs out of budget, without claiming it optimal
+        rushed = solve_by_shots(problem, exact_limit=0, budget=SearchBudget(max_expansions=3))
+        self.assertFalse(rushed.optimal)
+        self.assertTrue(problem.test_solution(rushed.solution)["is_solution"])
+        self.assertIsNone(pathfind_by_shots(MazeProblem(["XXXXXX", "XTX.TX", "XX...X", "X@...X", "XXXXXX"])))
+        
+    # Maze generator tests
+    # ---------------------------------------------------------------------------
+    def test_generate_maze(self) -> None:
+        maze = generate_maze(12, 8, seed=3, wall_density=0.2, mud_density=0.2, targets=5, solvable=True)
+        problem = MazeProblem(maze)
+        
+        self.assertEqual(maze, generate_maze(12, 8, seed=3, wall_density=0.2, mud_density=0.2, targets=5, solvable=True))
+        self.assertEqual(problem.get_dimensions(), (12, 8))
+        self.assertEqual(len(problem.get_initial_targets()), 5)
+        self.assertTrue(problem.is_solvable())
+        self.assertTrue(all(row[0] == row[-1] == Constants.WALL_BLOCK for row in maze))
+        self.assertEqual(load_corpus("small"), load_corpus("small"))
+        with self.assertRaises(ValueError):
+            generate_maze(10, 10, wall_density=0.8, mud_density=0.3)
+        
+    # Batch solver tests
+    # ---------------------------------------------------------------------------
+    def test_pathfind_many(self) -> None:
+        mazes = [
+            ["XXXXXX", "XT...X", "X....X", "X@...X", "XXXXXX"],
+            ["XXXXXX", "XTX..X", "XX...X", "X@...X", "XXXXXX"],
+            ["XXXXXX", "XT...X", "X.XT.X", "X@..TX", "XXXXXX"],
+        ] * 3
+        
+        for workers in [0, 2]:
+            results = list(pathfind_many(mazes, workers=workers, chunk_size=2))
+            self.assertEqual([r.index for r in results], list(range(len(mazes))))
+            self.assertEqual([r.cost for r in results], [2, -1, 6] * 3)
+            self.assertTrue(all(MazeProblem(mazes[r.index]).test_solution(r.solution)["is_solution"] for r in results if r.solution))
+        unordered = list(pathfind_many(mazes, workers=2, chunk_size=1, ordered=False))
+        self.assertEqual(sorted(r.index for r in unordered), list(range(len(mazes))))
+
+    def test_solve_parallel(self) -> None:
+        for seed in range(3):
+            problem = MazeProblem(generate_maze(12, 12, seed=seed, targets=4))
+            expected = solve(problem)
+            result = solve_parallel(problem, workers=3, batch_size=8)
+            self.assertEqual((result.status, result.cost), (expected.status, expected.cost))
+            if result.solution is not None:
+                self.assertEqual(problem.test_solution(result.solution), {"is_solution": True, "cost": expected.cost})
+        with self.assertLogs("parallel_astar", "WARNING"):
+            exhausted = solve_parallel(MazeProblem(generate_maze(20, 20, targets=4, solvable=True)), workers=2, budget=SearchBudget(max_expansions=5))
+        self.assertEqual(exhausted.status, SearchStatus.BUDGET_EXHAUSTED)
+        self.assertEqual(pathfind_parallel(MazeProblem(["XXXXXX", "XTX..X", "XX...X", "X@...X", "XXXXXX"]), workers=2), None)
+        # A worker dying before answering the coordinator is reported rather than waited for
+        context = multiprocessing.get_context()
+        dead_worker = context.Process(target=int)
+        dead_worker.start()
+        dead_worker.join()
+        with self.assertRaises(RuntimeError):
+            _await_reply(context.Queue(), [dead_worker])
+        
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,180 @@
+'''
+Re-planning for sessions in which a maze changes between queries: targets get destroyed,
+the player moves, and tiles turn into walls, mud or safe ground. A ReplanningPlanner
+answers queries along its last plan without searching at all, and keeps the maze's distance
+tables up to date by repairing only the cells a tile change affects.
+
+The search itself is not incremental: no search tree is kept between queries (as D* Lite
+or Lifelong Planning A* would), so any change that leaves the last plan runs a new A*
+search from the current state, which costs about as much as solving that state from
+scratch, only with distance tables that need no rebuilding.
+'''
+from maze_problem import MazeProblem
+from constants import Constants
+from heuristics import VantageDistances, VantageHeuristic
+from pathfinder import SearchBudget, SearchResult, SearchState, SearchStatus, solve
+from typing import *
+
+class ReplanningPlanner:
+    """
+    Plans the optimal remaining sequence of actions from the current state of a changing
+    maze. Changes are reported as deltas (remove_target, move_player, set_tile), after which
+    plan returns an optimal plan from the resulting state:
+        - Moves and target removals that follow the last plan reuse its remainder, which is
+          still optimal, so replaying a plan step by step costs no search at all.
+        - Tile changes repair the VantageDistances tables guiding the search in place, in
+          time proportional to the region whose distances depend on the changed tile, but
+          drop the last plan.
+        - Anything else, such as a target removed out of the plan's order or a step off the
+          plan, makes the next call to plan run a full A* search from the current state.
+    """
+    def __init__(self, problem: MazeProblem, budget: Optional[SearchBudget] = None) -> None:
+        """
+        Starts planning from the problem's initial state.
+
+        Parameters:
+            problem (MazeProblem):
+                The maze to plan in; it is modified in place by set_tile.
+            budget (Optional[SearchBudget]):
+                If given, the resource limits of every search run by plan.
+        """
+        self._problem = problem
+        self._budget = budget
+        self._distances = VantageDistances(problem)
+        self._heuristic = VantageHeuristic(problem, self._distances)
+        self._state = SearchState(problem.get_cell_id(problem.get_initial_loc()), problem.get_initial_target_mask())
+        self._plan: list[str] = []
+        # Maps each state along the last plan to the number of its actions taken to reach it
+        # and the cost of those actions
+        self._trajectory: dict[SearchState, tuple[int, int]] = {}
+
+    def get_state(self) -> SearchState:
+        """
+        Returns the current state: the player's cell id and the mask of targets remaining.
+
+        Returns:
+            SearchState:
+                The state that plan searches from.
+        """
+        return self._state
+
+    def remove_target(self, loc: tuple[int, int]) -> None:
+        """
+        Records that the target at the given location has been destroyed.
+
+        Parameters:
+            loc (tuple[int, int]):
+                The location of a remaining target.
+
+        Raises:
+            ValueError:
+                If there is no remaining target at loc.
+        """
+        target_bit = self._problem.get_target_mask([loc])
+        if not target_bit & self._state.targets_mask:
+            raise ValueError(f"no remaining target at {loc}")
+        self._state = SearchState(self._state.cell, self._state.targets_mask & ~target_bit)
+
+    def move_player(self, loc: tuple[int, int]) -> None:
+        """
+        Records that the player is now at the given location.
+
+        Parameters:
+            loc (tuple[int, int]):
+                The player's new location, a tile that is neither a wall nor a remaining target.
+
+        Raises:
+            ValueError:
+                If loc is outside the maze, a wall or a remaining target.
+        """
+        cell = self._problem.get_cell_id(loc)
+        if cell < 0 or not self._problem.get_cell_cost(cell) or self._problem.get_target_mask([loc]) & self._state.targets_mask:
+            raise ValueError(f"the player cannot stand at {loc}")
+        self._state = SearchState(cell, self._state.targets_mask)
+
+    def set_tile(self, loc: tuple[int, int], block: str) -> None:
+        """
+        Changes the tile at the given location and repairs the distance tables around it; the
+        last plan is dropped, since it may no longer be optimal or even possible. The tiles
+        that may change are those of MazeProblem.set_tile, with the player where it stands now.
+
+        Parameters:
+            loc (tuple[int, int]):
+                The location of the tile to change.
+            block (str):
+                The new content of the tile: Constants.WALL_BLOCK, SAFE_BLOCK or MUD_BLOCK.
+
+        Raises:
+            ValueError:
+                If the tile cannot be changed into block (see MazeProblem.set_tile).
+        """
+        problem = self._problem
+        cell = problem.get_cell_id(loc)
+        old_cost = problem.get_cell_cost(cell) if cell >= 0 else 0
+        problem.set_tile(loc, block, problem.get_cell_loc(self._state.cell))
+        self._distances.repair(cell, old_cost)
+        if bool(old_cost) != bool(problem.get_cell_cost(cell)):
+            # Opening or closing a tile can change how many targets a single shot may hit
+            self._heuristic = VantageHeuristic(problem, self._distances)
+        self._plan, self._trajectory = [], {}
+
+    def plan(self) -> SearchResult:
+        """
+        Returns an optimal plan from the current state, reusing the remainder of the last plan
+        if the current state lies along it, and otherwise searching from scratch.
+
+        Returns:
+            SearchResult:
+                The outcome of planning from the current state; its expansions are 0 when the
+                last plan was reused.
+        """
+        progress = self._trajectory.get(self._state)
+        if progress is not None:
+            (steps, cost_so_far) = progress
+            (_, total_cost) = self._trajectory[self._final_state()]
+            remaining_plan = self._plan[steps:]
+            return SearchResult(SearchStatus.SOLVED, remaining_plan, total_cost - cost_so_far, 0, remaining_plan)
+        result = solve(self._problem, self._heuristic, self._budget, start=self._state)
+        if result.solution is not None:
+            self._plan = result.solution
+            self._trajectory = self._replay(result.solution)
+        return result
+
+    def _final_state(self) -> SearchState:
+        """
+        Returns the goal state reached by the last plan, with the player where it ends.
+
+        Returns:
+            SearchState:
+                The last state of the trajectory.
+        """
+        return next(reversed(self._trajectory))
+
+    def _replay(self, solution: list[str]) -> dict[SearchState, tuple[int, int]]:
+        """
+        Steps through the given plan from the current state, recording every state visited.
+
+        Parameters:
+            solution (list[str]):
+                A plan found from the current state.
+
+        Returns:
+            dict[SearchState, tuple[int, int]]:
+                The number of actions taken and their cost on reaching each state, in order.
+        """
+        problem = self._problem
+        state = self._state
+        cost = 0
+        trajectory = {state: (0, cost)}
+        for (step, action) in enumerate(solution, 1):
+            if action == "S":
+                cost += Constants.SHOOTING_COST
+                state = SearchState(state.cell, state.targets_mask & ~problem.get_shot_mask(state.cell, state.targets_mask))
+            else:
+                (x, y) = problem.get_cell_loc(state.cell)
+                (dx, dy) = Constants.MOVE_DIRS[action]
+                next_cell = problem.get_cell_id((x + dx, y + dy))
+                cost += problem.get_cell_cost(next_cell)
+                state = SearchState(next_cell, state.targets_mask)
+            trajectory[state] = (step, cost)
+        return trajectory
@@ -0,0 +1,399 @@
+'''
+Alternative solver that decomposes a maze by shot instead of by step. Every optimal plan is
+a sequence of legs, each walking by a shortest route to some vantage cell and firing a shot
+that hits at least one target, so the search only needs to choose where to shoot next:
+    1. From the current shot cell and remaining targets, one Dijkstra pass (in which the
+       remaining targets block the way and mud costs extra) finds the cost of walking to
+       every vantage cell of a remaining target.
+    2. The order of the shots is searched over those legs, exactly by A* when there are few
+       targets, and by depth-first branch and bound, which finds good plans early and
+       improves on them, when there are many.
+    3. The chosen legs are expanded back into U/D/L/R/S actions.
+Each leg replaces the many single-step states A* over (location, remaining targets) would
+expand between two shots, so this scales to mazes with dozens of targets.
+'''
+from maze_problem import MazeProblem
+from constants import Constants
+from heuristics import Heuristic, SpanningTreeHeuristic, UNREACHABLE
+from pathfinder import SearchBudget, SearchStatus
+from typing import *
+import heapq
+import itertools
+import time
+
+class ShotPlanResult(NamedTuple):
+    """
+    Outcome of planning by shot, as returned by solve_by_shots.
+
+    Attributes:
+        status (SearchStatus):
+            SOLVED if a plan was found (optimal or not), UNSOLVABLE if there is none, and
+            BUDGET_EXHAUSTED if the budget ran out before any plan was found.
+        solution (Optional[list[str]]):
+            The best sequence of actions found, or None unless status is SOLVED.
+        cost (int):
+            The total cost of solution, or -1 if there is none.
+        expansions (int):
+            The number of shot states expanded, i.e., Dijkstra passes run.
+        optimal (bool):
+            Whether solution is proven optimal: always so for exact A*, and for branch and
+            bound if it ran to completion within the budget.
+    """
+    status: SearchStatus
+    solution: Optional[list[str]]
+    cost: int
+    expansions: int
+    optimal: bool
+
+class _Leg(NamedTuple):
+    """
+    One walk-then-shoot step of a plan by shot.
+    """
+    from_cell: int
+    targets_mask: int
+    to_cell: int
+
+class _BudgetExhausted(Exception):
+    """
+    Raised from deep within the branch and bound search to unwind it when out of budget.
+    """
+    pass
+
+class ShotPlanner:
+    """
+    Plans by shot over a single MazeProblem, caching the vantage cells of every set of
+    remaining targets between searches.
+    """
+    def __init__(self, problem: MazeProblem, heuristic: Optional[Heuristic] = None) -> None:
+        """
+        Parameters:
+            problem (MazeProblem):
+                The maze to plan in.
+            heuristic (Optional[Heuristic]):
+                The admissible heuristic bounding the cost left after each shot, defaulting
+                to a SpanningTreeHeuristic built on problem.
+        """
+        self._problem = problem
+        self._heuristic: Heuristic = heuristic if heuristic is not None else SpanningTreeHeuristic(problem)
+        self._target_cells: list[int] = [problem.get_cell_id(target) for target in problem.get_target_order()]
+        self._target_vantages: list[frozenset[int]] = [frozenset(problem.get_vantage_cells(target)) for target in problem.get_target_order()]
+        self._vantages: dict[int, frozenset[int]] = {}
+
+    def _vantage_cells(self, targets_mask: int) -> frozenset[int]:
+        """
+        Returns every cell from which at least one of the given targets can be shot, other
+        than the targets' own tiles, on which the player cannot stand while they remain.
+
+        Parameters:
+            targets_mask (int):
+                The mask of remaining targets.
+
+        Returns:
+            frozenset[int]:
+                The union of the vantage cells of the remaining targets.
+        """
+        cells = self._vantages.get(targets_mask)
+        if cells is None:
+            remaining = [i for i in range(len(self._target_cells)) if targets_mask >> i & 1]
+            cells = frozenset().union(*(self._target_vantages[i] for i in remaining)).difference(self._target_cells[i] for i in remaining)
+            self._vantages[targets_mask] = cells
+        return cells
+
+    def walk(self, source: int, targets_mask: int, stop_at: Optional[int] = None) -> tuple[dict[int, int], dict[int, tuple[int, int]]]:
+        """
+        Runs Dijkstra's algorithm from the given cell, with the remaining targets blocking the
+        way, until every vantage cell of the remaining targets (or the given cell) is settled.
+
+        Parameters:
+            source (int):
+                The cell id to walk from.
+            targets_mask (int):
+                The mask of remaining targets.
+            stop_at (Optional[int]):
+                If given, the only cell whose distance is needed.
+
+        Returns:
+            tuple[dict[int, int], dict[int, tuple[int, int]]]:
+                The cost of walking to each settled vantage cell (or to stop_at), and the
+                (previous cell, action code) leading into each cell reached.
+        """
+        problem = self._problem
+        goals = {stop_at} if stop_at is not None else self._vantage_cells(targets_mask)
+        left = len(goals)
+        dist: dict[int, int] = {source: 0}
+        parents: dict[int, tuple[int, int]] = {}
+        settled: dict[int, int] = {}
+        heap = [(0, source)]
+        while heap and left:
+            (d, cell) = heapq.heappop(heap)
+            if d > dist[cell]:
+                continue
+            if cell in goals:
+                settled[cell] = d
+                left -= 1
+            for (action_code, next_cell, cost, target_bit) in problem.get_moves(cell):
+                if target_bit & targets_mask:
+                    continue
+                if d + cost < dist.get(next_cell, UNREACHABLE):
+                    dist[next_cell] = d + cost
+                    parents[next_cell] = (cell, action_code)
+                    heapq.heappush(heap, (d + cost, next_cell))
+        return settled, parents
+
+    def legs_from(self, cell: int, targets_mask: int) -> list[tuple[int, int, int]]:
+        """
+        Returns the next legs worth trying from the given shot state: walking to a vantage
+        cell of a remaining target and shooting there. A leg is dominated, and left out, if
+        its shortest route passes a vantage cell hitting every target it would hit: shooting
+        there on the way leaves no more targets standing (and so no more obstacles) at no
+        extra cost, whatever the rest of the plan.
+
+        Parameters:
+            cell (int):
+                The cell id the player stands on.
+            targets_mask (int):
+                The mask of remaining targets.
+
+        Returns:
+            list[tuple[int, int, int]]:
+                One (leg cost including the shot, vantage cell id, targets mask left) tuple
+                per undominated reachable vantage cell.
+        """
+        (settled, parents) = self.walk(cell, targets_mask)
+        problem = self._problem
+        hits = {vantage: problem.get_shot_mask(vantage, targets_mask) for vantage in settled}
+        # The hit masks of the vantage cells passed on the way to each cell, keeping only the
+        # ones not contained in another
+        passed: dict[int, tuple[int, ...]] = {cell: ()}
+
+        def passed_on_way(to_cell: int) -> tuple[int, ...]:
+            route = []
+            while to_cell not in passed:
+                route.append(to_cell)
+                to_cell = parents[to_cell][0]
+            masks = passed[to_cell]
+            for route_cell in reversed(route):
+                (previous, _) = parents[route_cell]
+                previous_hit = hits.get(previous, 0)
+                if previous_hit and not any(previous_hit | mask == mask for mask in masks):
+                    masks = tuple(mask for mask in masks if mask | previous_hit != previous_hit) + (previous_hit,)
+                passed[route_cell] = masks
+            return masks
+
+        legs = []
+        for (vantage, d) in settled.items():
+            hit = hits[vantage]
+            if hit and not any(hit | mask == mask for mask in passed_on_way(vantage)):
+                legs.append((d + Constants.SHOOTING_COST, vantage, targets_mask & ~hit))
+        return legs
+
+    def solve(self, exact_limit: int = 8, budget: Optional[SearchBudget] = None) -> ShotPlanResult:
+        """
+        Plans by shot from the problem's initial state; see solve_by_shots.
+        """
+        problem = self._problem
+        start = problem.get_cell_id(problem.get_initial_loc())
+        targets_mask = problem.get_initial_target_mask()
+        if not problem.is_solvable():
+            return ShotPlanResult(SearchStatus.UNSOLVABLE, None, -1, 0, True)
+        budget = budget if budget is not None else SearchBudget()
+        if targets_mask.bit_count() <= exact_limit:
+            return self._solve_exact(start, targets_mask, budget)
+        return self._solve_branch_and_bound(start, targets_mask, budget)
+
+    def _solve_exact(self, start: int, targets_mask: int, budget: SearchBudget) -> ShotPlanResult:
+        """
+        A* over shot states (cell shot from, targets left), which is optimal since the
+        heuristic bounds the cost left from any state.
+
+        Parameters:
+            start (int):
+                The player's initial cell id.
+            targets_mask (int):
+                The mask of all targets.
+            budget (SearchBudget):
+                The limits on expansions and time.
+
+        Returns:
+            ShotPlanResult:
+                The optimal plan, or BUDGET_EXHAUSTED.
+        """
+        (deadline, max_expansions, _) = budget.get_limits(time.monotonic())
+        initial = (start, targets_mask)
+        best_g: dict[tuple[int, int], int] = {initial: 0}
+        parents: dict[tuple[int, int], tuple[int, int]] = {}
+        tiebreaker = itertools.count()
+        frontier = [(self._heuristic(start, targets_mask), next(tiebreaker), 0, initial)]
+        expansions = 0
+        while frontier:
+            (_, _, g, state) = heapq.heappop(frontier)
+            (cell, mask) = state
+            if g > best_g[state]:
+                continue
+            if not mask:
+                return self._result(self._chain(parents, state), g, expansions, True)
+            if expansions >= max_expansions or time.monotonic() > deadline:
+                return ShotPlanResult(SearchStatus.BUDGET_EXHAUSTED, None, -1, expansions, False)
+            expansions += 1
+            for (leg_cost, vantage, child_mask) in self.legs_from(cell, mask):
+                child = (vantage, child_mask)
+                child_g = g + leg_cost
+                if child_g >= best_g.get(child, UNREACHABLE):
+                    continue
+                h = self._heuristic(vantage, child_mask)
+                if h >= UNREACHABLE:
+                    continue
+                best_g[child] = child_g
+                parents[child] = state
+                heapq.heappush(frontier, (child_g + h, next(tiebreaker), child_g, child))
+        return ShotPlanResult(SearchStatus.UNSOLVABLE, None, -1, expansions, True)
+
+    def _solve_branch_and_bound(self, start: int, targets_mask: int, budget: SearchBudget) -> ShotPlanResult:
+        """
+        Depth-first branch and bound over shot states, trying the most promising leg first
+        so that a good plan is found quickly, then pruning every branch whose lower bound
+        cannot beat the best plan so far. Memory stays proportional to the shot states seen.
+
+        Parameters:
+            start (int):
+                The player's initial cell id.
+            targets_mask (int):
+                The mask of all targets.
+            budget (SearchBudget):
+                The limits on expansions and time; running out keeps the best plan so far,
+                which is then not known to be optimal.
+
+        Returns:
+            ShotPlanResult:
+                The best plan found, or BUDGET_EXHAUSTED if none was.
+        """
+        (deadline, max_expansions, _) = budget.get_limits(time.monotonic())
+        best_g: dict[tuple[int, int], int] = {}
+        path: list[tuple[int, int]] = []
+        incumbent_cost = UNREACHABLE
+        incumbent: list[tuple[int, int]] = []
+        expansions = 0
+
+        def search(cell: int, mask: int, g: int) -> None:
+            nonlocal incumbent_cost, incumbent, expansions
+            path.append((cell, mask))
+            if not mask:
+                if g < incumbent_cost:
+                    incumbent_cost, incumbent = g, list(path)
+                path.pop()
+                return
+            if expansions >= max_expansions or time.monotonic() > deadline:
+                raise _BudgetExhausted()
+            expansions += 1
+            children = []
+            for (leg_cost, vantage, child_mask) in self.legs_from(cell, mask):
+                child_g = g + leg_cost
+                h = self._heuristic(vantage, child_mask)
+                if h < UNREACHABLE and child_g + h < incumbent_cost and child_g < best_g.get((vantage, child_mask), UNREACHABLE):
+                    best_g[(vantage, child_mask)] = child_g
+                    children.append((child_g + h, child_g, vantage, child_mask))
+            children.sort()
+            for (f, child_g, vantage, child_mask) in children:
+                # The incumbent may have improved since the children were generated
+                if f < incumbent_cost and child_g <= best_g[(vantage, child_mask)]:
+                    search(vantage, child_mask, child_g)
+            path.pop()
+
+        try:
+            search(start, targets_mask, 0)
+            optimal = True
+        except _BudgetExhausted:
+            optimal = False
+        if not incumbent:
+            status = SearchStatus.UNSOLVABLE if optimal else SearchStatus.BUDGET_EXHAUSTED
+            return ShotPlanResult(status, None, -1, expansions, optimal)
+        legs = [_Leg(from_cell, mask, to_cell) for ((from_cell, mask), (to_cell, _)) in zip(incumbent, incumbent[1:])]
+        return self._result(legs, incumbent_cost, expansions, optimal)
+
+    def _chain(self, parents: dict[tuple[int, int], tuple[int, int]], state: tuple[int, int]) -> list[_Leg]:
+        """
+        Follows the parents of the given shot state back to the start.
+
+        Parameters:
+            parents (dict[tuple[int, int], tuple[int, int]]):
+                The shot state each shot state was reached from.
+            state (tuple[int, int]):
+                The goal shot state.
+
+        Returns:
+            list[_Leg]:
+                The legs leading from the start to state, in order.
+        """
+        legs = []
+        while state in parents:
+            parent = parents[state]
+            legs.append(_Leg(parent[0], parent[1], state[0]))
+            state = parent
+        legs.reverse()
+        return legs
+
+    def _result(self, legs: list[_Leg], cost: int, expansions: int, optimal: bool) -> ShotPlanResult:
+        """
+        Expands the given legs into actions, re-walking each one to recover its route.
+
+        Parameters:
+            legs (list[_Leg]):
+                The legs of the plan, in order.
+            cost (int):
+                The total cost of the plan.
+            expansions (int):
+                The number of shot states expanded to find it.
+            optimal (bool):
+                Whether the plan is proven optimal.
+
+        Returns:
+            ShotPlanResult:
+                A SOLVED result holding the plan.
+        """
+        solution: list[str] = []
+        for leg in legs:
+            (_, parents) = self.walk(leg.from_cell, leg.targets_mask, leg.to_cell)
+            route: list[str] = []
+            cell = leg.to_cell
+            while cell != leg.from_cell:
+                (cell, action_code) = parents[cell]
+                route.append(Constants.MOVES[action_code])
+            solution.extend(reversed(route))
+            solution.append("S")
+        return ShotPlanResult(SearchStatus.SOLVED, solution, cost, expansions, optimal)
+
+def solve_by_shots(problem: MazeProblem, exact_limit: int = 8, budget: Optional[SearchBudget] = None,
+                   heuristic: Optional[Heuristic] = None) -> ShotPlanResult:
+    """
+    Solves the given maze by deciding where to shoot from next rather than where to step
+    next (see the module's description); an alternative to pathfinder.solve for mazes with
+    many targets.
+
+    Parameters:
+        problem (MazeProblem):
+            The maze to solve.
+        exact_limit (int):
+            The most targets for which the search is exact A*; above it, the search is branch
+            and bound, which is also exact when it completes within the budget.
+        budget (Optional[SearchBudget]):
+            If given, limits on the shot states expanded (max_expansions) and the time spent
+            (time_limit); other limits do not apply.
+        heuristic (Optional[Heuristic]):
+            The admissible heuristic to bound the cost left with, defaulting to a
+            SpanningTreeHeuristic built on problem.
+
+    Returns:
+        ShotPlanResult:
+            The plan found, and whether it is proven optimal.
+    """
+    return ShotPlanner(problem, heuristic).solve(exact_limit, budget)
+
+def pathfind_by_shots(problem: MazeProblem, exact_limit: int = 8, budget: Optional[SearchBudget] = None) -> Optional[list[str]]:
+    """
+    Plan-only counterpart of solve_by_shots, mirroring pathfinder.pathfind.
+
+    Returns:
+        Optional[list[str]]:
+            The best plan found, or None if there is none or the budget ran out first.
+    """
+    return solve_by_shots(problem, exact_limit, budget).solution
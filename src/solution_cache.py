@@ -0,0 +1,320 @@
+'''
+Memoizing layer in front of pathfind, for traffic in which the same mazes, and mirrored or
+rotated copies of them, come up again and again. Mazes are keyed by a hash of their
+canonical orientation, the least of the grid's 8 rotations and reflections, so that every
+copy of a maze shares a single entry; plans are stored in that orientation and turned back
+into each copy's own on the way out.
+'''
+from maze_problem import MazeProblem
+from heuristics import Heuristic
+from pathfinder import SearchBudget, SearchResult, SearchStatus, solve
+from collections import OrderedDict
+from typing import *
+import hashlib
+import shelve
+
+class Orientation(NamedTuple):
+    """
+    One of the 8 symmetries of a rectangular grid: an optional mirroring along each axis,
+    followed by an optional swap of the axes (a transposition).
+    """
+    flip_x: bool
+    flip_y: bool
+    transpose: bool
+
+    def map_action(self, action: str) -> str:
+        """
+        Returns the action that moves the player in the same direction once the grid has
+        been transformed by this orientation.
+
+        Parameters:
+            action (str):
+                One of Constants.MOVES.
+
+        Returns:
+            str:
+                The transformed action.
+        """
+        return _ACTION_MAPS[self][action]
+
+    def unmap_action(self, action: str) -> str:
+        """
+        Inverse of map_action: returns the action that, once the grid has been transformed
+        by this orientation, moves the player in the given direction.
+
+        Parameters:
+            action (str):
+                One of Constants.MOVES, in the transformed grid.
+
+        Returns:
+            str:
+                The action in the original grid.
+        """
+        return _ACTION_UNMAPS[self][action]
+
+ORIENTATIONS: tuple[Orientation, ...] = tuple(Orientation(bool(i & 1), bool(i & 2), bool(i & 4)) for i in range(8))
+_DIRECTIONS: dict[tuple[int, int], str] = {(0, -1): "U", (0, 1): "D", (-1, 0): "L", (1, 0): "R", (0, 0): "S"}
+
+def _transform_direction(orientation: Orientation, direction: tuple[int, int]) -> tuple[int, int]:
+    """
+    Returns the given (dx, dy) movement as seen in a grid transformed by the given orientation.
+    """
+    (dx, dy) = direction
+    dx, dy = (-dx if orientation.flip_x else dx), (-dy if orientation.flip_y else dy)
+    return (dy, dx) if orientation.transpose else (dx, dy)
+
+_ACTION_MAPS: dict[Orientation, dict[str, str]] = {
+    o: {action: _DIRECTIONS[_transform_direction(o, direction)] for (direction, action) in _DIRECTIONS.items()}
+    for o in ORIENTATIONS
+}
+_ACTION_UNMAPS: dict[Orientation, dict[str, str]] = {
+    o: {mapped: action for (action, mapped) in actions.items()} for (o, actions) in _ACTION_MAPS.items()
+}
+
+def orient_grid(grid: bytes, width: int, orientation: Orientation) -> tuple[bytes, int]:
+    """
+    Returns the given row-major grid transformed by the given orientation.
+
+    Parameters:
+        grid (bytes):
+            The tiles of the grid, row after row.
+        width (int):
+            The length of each row.
+        orientation (Orientation):
+            The symmetry to apply.
+
+    Returns:
+        tuple[bytes, int]:
+            The transformed grid, row after row, and the length of its rows.
+    """
+    height = len(grid) // width if width else 0
+    rows = [grid[y * width:(y + 1) * width] for y in range(height)]
+    if orientation.flip_x:
+        rows = [row[::-1] for row in rows]
+    if orientation.flip_y:
+        rows.reverse()
+    if orientation.transpose:
+        flipped = b"".join(rows)
+        return b"".join(flipped[x::width] for x in range(width)), height
+    return b"".join(rows), width
+
+def canonical_fingerprint(problem: MazeProblem) -> tuple[str, Orientation]:
+    """
+    Computes the key shared by the given maze and all of its rotations and reflections: a
+    BLAKE2 digest of whichever of its 8 orientations sorts first, dimensions included.
+
+    Parameters:
+        problem (MazeProblem):
+            The maze to fingerprint, whose walls, mud, targets and player all take part.
+
+    Returns:
+        tuple[str, Orientation]:
+            The hex digest, and the orientation turning the maze into its canonical form.
+    """
+    grid = bytes(problem.get_grid())
+    (width, _) = problem.get_dimensions()
+    candidates = []
+    for orientation in ORIENTATIONS:
+        (oriented, oriented_width) = orient_grid(grid, width, orientation)
+        candidates.append((oriented_width.to_bytes(4, "little") + oriented, orientation))
+    (canonical, orientation) = min(candidates, key=lambda candidate: candidate[0])
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest(), orientation
+
+class SolutionCache:
+    """
+    Size-bounded LRU cache of search results keyed by canonical_fingerprint, optionally
+    backed by a persistent on-disk tier (a shelve database) that outlives the process and
+    the in-memory capacity. Only conclusive results (solved or unsolvable) are cached, and
+    cached plans are checked with MazeProblem.test_solution before being returned, unless
+    verification is turned off.
+
+    Attributes:
+        hits (int):
+            Lookups answered from the cache, from either tier.
+        disk_hits (int):
+            Lookups answered from the on-disk tier only.
+        misses (int):
+            Lookups that had to search.
+    """
+    def __init__(self, capacity: int = 1024, path: Optional[str] = None, verify: bool = True) -> None:
+        """
+        Parameters:
+            capacity (int):
+                The most entries kept in memory; the least recently used are evicted first.
+            path (Optional[str]):
+                If given, the file name of the on-disk tier, created if missing.
+            verify (bool):
+                Whether to check cached plans against the maze before returning them.
+
+        Raises:
+            ValueError:
+                If capacity is less than 1.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._capacity = capacity
+        self._verify = verify
+        self._entries: OrderedDict[str, tuple[int, Optional[list[str]]]] = OrderedDict()
+        self._disk: Optional[shelve.Shelf] = shelve.open(path) if path is not None else None
+        self.hits: int = 0
+        self.disk_hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __enter__(self) -> "SolutionCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Flushes and closes the on-disk tier, if any; the in-memory tier remains usable.
+        """
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def get(self, problem: MazeProblem) -> Optional[SearchResult]:
+        """
+        Looks up the result of searching the given maze, in its own orientation.
+
+        Parameters:
+            problem (MazeProblem):
+                The maze to look up.
+
+        Returns:
+            Optional[SearchResult]:
+                The cached result, or None if there is none (or it failed verification). Its
+                expansions are 0.
+        """
+        (key, orientation) = canonical_fingerprint(problem)
+        entry = self._entries.get(key)
+        from_disk = False
+        if entry is not None:
+            self._entries.move_to_end(key)
+        elif self._disk is not None and key in self._disk:
+            entry, from_disk = self._disk[key], True
+        if entry is None:
+            self.misses += 1
+            return None
+        (cost, canonical_plan) = entry
+        if canonical_plan is None:
+            result = SearchResult(SearchStatus.UNSOLVABLE, None, -1, 0, [])
+        else:
+            solution = [orientation.unmap_action(action) for action in canonical_plan]
+            if self._verify and not self._holds(problem, solution, cost):
+                self._forget(key)
+                self.misses += 1
+                return None
+            result = SearchResult(SearchStatus.SOLVED, solution, cost, 0, solution)
+        if from_disk:
+            self.disk_hits += 1
+            self._remember(key, entry)
+        self.hits += 1
+        return result
+
+    def put(self, problem: MazeProblem, result: SearchResult) -> None:
+        """
+        Caches the result of searching the given maze, unless it is inconclusive: only
+        SOLVED and UNSOLVABLE results are kept, so that a search cut short (by its budget or
+        by cancellation) is never served back as the maze having no solution.
+
+        Parameters:
+            problem (MazeProblem):
+                The maze that was searched.
+            result (SearchResult):
+                The outcome of searching it from its initial state.
+        """
+        if result.status not in (SearchStatus.SOLVED, SearchStatus.UNSOLVABLE):
+            return
+        (key, orientation) = canonical_fingerprint(problem)
+        canonical_plan = [orientation.map_action(action) for action in result.solution] if result.solution is not None else None
+        entry = (result.cost, canonical_plan)
+        self._remember(key, entry)
+        if self._disk is not None:
+            self._disk[key] = entry
+
+    def _holds(self, problem: MazeProblem, solution: list[str], cost: int) -> bool:
+        """
+        Checks that a cached plan solves the given maze at its recorded cost, guarding against
+        fingerprint collisions and stale on-disk entries.
+
+        Parameters:
+            problem (MazeProblem):
+                The maze looked up.
+            solution (list[str]):
+                The cached plan, in the maze's own orientation.
+            cost (int):
+                The cached cost of the plan.
+
+        Returns:
+            bool:
+                True if the plan is a solution of the recorded cost.
+        """
+        check = problem.test_solution(solution)
+        return bool(check["is_solution"]) and check["cost"] == cost
+
+    def _forget(self, key: str) -> None:
+        """
+        Drops an entry from both tiers.
+
+        Parameters:
+            key (str):
+                The canonical fingerprint of the maze.
+        """
+        self._entries.pop(key, None)
+        if self._disk is not None and key in self._disk:
+            del self._disk[key]
+
+    def _remember(self, key: str, entry: tuple[int, Optional[list[str]]]) -> None:
+        """
+        Adds an entry to the in-memory tier as its most recently used, evicting the least
+        recently used entry if it is full.
+
+        Parameters:
+            key (str):
+                The canonical fingerprint of the maze.
+            entry (tuple[int, Optional[list[str]]]):
+                The cost and canonical plan (None if unsolvable) of the maze.
+        """
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
+
+    def solve(self, problem: MazeProblem, heuristic: Optional[Heuristic] = None, budget: Optional[SearchBudget] = None) -> SearchResult:
+        """
+        Returns the cached result of the given maze if there is one, or else searches it
+        with pathfinder.solve and caches the outcome.
+
+        Parameters:
+            problem (MazeProblem):
+                The maze to solve.
+            heuristic (Optional[Heuristic]):
+                The heuristic to search with on a miss (see pathfinder.solve).
+            budget (Optional[SearchBudget]):
+                The resource limits of the search on a miss (see pathfinder.solve).
+
+        Returns:
+            SearchResult:
+                The outcome for the maze, in its own orientation.
+        """
+        cached = self.get(problem)
+        if cached is not None:
+            return cached
+        result = solve(problem, heuristic, budget)
+        self.put(problem, result)
+        return result
+
+    def pathfind(self, problem: MazeProblem, heuristic: Optional[Heuristic] = None, budget: Optional[SearchBudget] = None) -> Optional[list[str]]:
+        """
+        Cached counterpart of pathfinder.pathfind; see solve.
+
+        Returns:
+            Optional[list[str]]:
+                A solution to the problem, or None if there is none.
+        """
+        return self.solve(problem, heuristic, budget).solution